@@ -0,0 +1,53 @@
+"""Measures how many rounds per second pair_rounds_batch pairs with
+different numbers of worker processes, for a batch of small independent
+tournaments like a night of club events.
+
+Run from the repository root:
+
+    python benchmarks/batch_throughput.py --events 400 --players 24
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from swissdutch.dutch import DutchPairingEngine
+from swissdutch.batch import PairingJob, pair_rounds_batch
+from tournament import generate_players, play_round
+
+def make_jobs(seed, events, players):
+    rng    = random.Random(seed)
+    engine = DutchPairingEngine()
+    jobs   = []
+    for _ in range(events):
+        paired = engine.pair_round(1, generate_players(rng, players))
+        jobs.append(PairingJob(2, play_round(rng, paired)))
+    return jobs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=400)
+    parser.add_argument('--players', type=int, default=24)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.seed, args.events, args.players)
+    for workers in args.workers:
+        start   = time.perf_counter()
+        results = pair_rounds_batch(jobs, workers=workers)
+        seconds = time.perf_counter() - start
+        print(json.dumps({'workers': workers, 'events': args.events,
+                          'players': args.players, 'seconds': seconds,
+                          'rounds_per_second': args.events / seconds,
+                          'errors': sum(isinstance(r, Exception)
+                                        for r in results)},
+                         sort_keys=True))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Times the fixed cost pair_round pays to copy its input players, with the
+default deepcopy and with shallow_copy, for fields of 1,000 to 10,000 players
+that have already played nine rounds. The cost is the time pair_round takes
+to pair the first round beyond the time it takes with in_place, which pairs
+the same players without copying them. The first round is paired because
+its own cost hardly depends on the players' history.
+
+Run from the repository root:
+
+    python benchmarks/copy_overhead.py
+"""
+import os
+import sys
+import copy
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from swissdutch.dutch import DutchPairingEngine
+from swissdutch.constants import FideTitle, Colour, FloatStatus
+from swissdutch.player import Player
+
+ROUNDS_PLAYED = 9
+
+def make_players(n, rng):
+    colours = (Colour.white, Colour.black)
+    return [Player(name='Player {0}'.format(i),
+                   rating=rng.randint(1000, 2800),
+                   title=rng.choice((None, FideTitle.FM, FideTitle.IM)),
+                   pairing_no=i,
+                   score=rng.randint(0, 2 * ROUNDS_PLAYED) / 2,
+                   float_status=rng.choice(list(FloatStatus)),
+                   opponents=tuple(rng.randint(1, n)
+                                   for _ in range(ROUNDS_PLAYED)),
+                   colour_hist=tuple(rng.choice(colours)
+                                     for _ in range(ROUNDS_PLAYED)))
+            for i in range(1, n + 1)]
+
+def best_time(fn, setup, repeat=5):
+    """The best time of fn over repeat calls, each passed a fresh result of
+    setup made outside of the timing."""
+    best = float('inf')
+    for _ in range(repeat):
+        args  = setup()
+        start = time.perf_counter()
+        fn(args)
+        best  = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    rng     = random.Random(1)
+    colour  = lambda: Colour.white
+    engines = (DutchPairingEngine(colour),
+               DutchPairingEngine(colour, shallow_copy=True))
+
+    print('{0:>8} {1:>14} {2:>14}'.format('players', 'deepcopy',
+                                          'shallow_copy'))
+    for n in (1000, 2000, 5000, 10000):
+        players  = make_players(n, rng)
+        in_place = best_time(
+            lambda fresh: engines[0].pair_round(1, fresh, in_place=True),
+            lambda: copy.deepcopy(players))
+        times    = [best_time(lambda _: engine.pair_round(1, players),
+                              lambda: None) - in_place
+                    for engine in engines]
+        print('{0:>8} {1:>12.1f}ms {2:>12.1f}ms'.format(
+              n, *(t * 1000 for t in times)))
+
+if __name__ == '__main__':
+    main()
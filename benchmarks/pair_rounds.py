@@ -0,0 +1,105 @@
+"""Times pair_round for every round of seeded synthetic tournaments and
+prints the results as JSON, one object per line, for comparing engine
+changes and catching performance regressions.
+
+Run from the repository root, e.g.:
+
+    python benchmarks/pair_rounds.py --players 50 500 5000 --rounds 9
+    python benchmarks/pair_rounds.py --engine blossom --output blossom.jsonl
+
+Each line describes one round: the engine, seed, field size, round number,
+the number of players paired, the seconds pair_round took, and whether it
+fell back on its budget. A round that raises records the exception instead
+and ends that tournament.
+
+So that a default run always finishes, the Dutch engine is given a time
+budget of 10 seconds per round, and a tournament that has taken more than
+--max-seconds is stopped after its current round with a line recording the
+timeout. Pass --time-budget 0 to pair without a budget.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from swissdutch.dutch import DutchPairingEngine
+from swissdutch.blossom import BlossomPairingEngine
+from swissdutch.constants import Colour
+from tournament import play_tournament
+
+ENGINES = {'dutch': DutchPairingEngine, 'blossom': BlossomPairingEngine}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='dutch')
+    parser.add_argument('--players', type=int, nargs='+',
+                        default=[50, 500, 5000])
+    parser.add_argument('--rounds', type=int, default=9)
+    parser.add_argument('--seeds', type=int, nargs='+', default=[1])
+    parser.add_argument('--draw-rate', type=float, default=0.3)
+    parser.add_argument('--withdrawal-rate', type=float, default=0.01)
+    parser.add_argument('--time-budget', type=float, default=10,
+                        help='seconds allowed per round, 0 for no limit '
+                             '(dutch only)')
+    parser.add_argument('--max-seconds', type=float, default=300,
+                        help='seconds after which a tournament is stopped')
+    parser.add_argument('--output', default=None,
+                        help='write the results here instead of stdout')
+    return parser.parse_args()
+
+def run(args, engine_name, seed, n):
+    colours = random.Random(seed)
+    engine  = ENGINES[engine_name](
+        lambda: colours.choice((Colour.white, Colour.black)))
+    extra   = ({'time_budget': args.time_budget}
+               if engine_name == 'dutch' and args.time_budget else {})
+    rounds  = play_tournament(engine, seed, n, args.rounds, args.draw_rate,
+                              args.withdrawal_rate, **extra)
+    total   = 0
+
+    for round_no in range(1, args.rounds + 1):
+        record = {'engine': engine_name, 'seed': seed, 'players': n,
+                  'round': round_no}
+        start  = time.perf_counter()
+        try:
+            _, players, paired, seconds = next(rounds)
+        except StopIteration:
+            return
+        except Exception as e:
+            record.update(seconds=time.perf_counter() - start,
+                          error='{0}: {1}'.format(type(e).__name__, e))
+            yield record
+            return
+
+        record.update(seconds=seconds,
+                      paired=sum(len(p.opponents) == round_no for p in paired),
+                      field=len(players),
+                      budget_limited=getattr(paired, 'budget_limited', False))
+        yield record
+
+        total += seconds
+        if total > args.max_seconds and round_no < args.rounds:
+            yield {'engine': engine_name, 'seed': seed, 'players': n,
+                   'round': round_no + 1, 'timeout': total}
+            return
+
+def main():
+    args = parse_args()
+    out  = open(args.output, 'w') if args.output else sys.stdout
+
+    try:
+        for n in args.players:
+            for seed in args.seeds:
+                for record in run(args, args.engine, seed, n):
+                    out.write(json.dumps(record, sort_keys=True) + '\n')
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""A seeded generator of realistic tournament states for the benchmarks.
+
+A field of players is drawn from a normal rating distribution, and each
+round is paired by an engine, its results simulated from the Elo expected
+score with a fixed draw rate, and a fraction of the field withdrawn. The
+same seed always produces the same tournament, given the same engine.
+"""
+import time
+import random
+from swissdutch.constants import FideTitle, Colour
+from swissdutch.player import Player
+
+TITLES = ((2500, FideTitle.GM), (2400, FideTitle.IM), (2300, FideTitle.FM),
+          (2200, FideTitle.CM))
+
+def generate_players(rng, n, mean_rating=1800, rating_sd=300):
+    """Return n unpaired players with ratings drawn from a normal
+    distribution and the titles their ratings would suggest."""
+    players = []
+    for i in range(n):
+        rating = int(min(2850, max(1000, rng.gauss(mean_rating, rating_sd))))
+        title  = next((t for r, t in TITLES if rating >= r), None)
+        players.append(Player('Player {0}'.format(i + 1), rating, title))
+    return players
+
+def expected_score(rating, opponent_rating):
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+def play_round(rng, players, draw_rate=0.3, withdrawal_rate=0.0):
+    """Simulate the results of a paired round and return the players of
+    the next round, less those who withdraw."""
+    by_pairing_no = {p.pairing_no: p for p in players}
+    games         = max(len(p.opponents) for p in players)
+    points        = {}
+
+    for p in players:
+        if len(p.opponents) < games:
+            continue # left unpaired by the engine
+        opponent_no = p.opponents[-1]
+        if p.pairing_no in points or not opponent_no:
+            continue # scored already, or had the bye, which is scored
+
+        opponent = by_pairing_no[opponent_no]
+        if rng.random() < draw_rate:
+            result = 0.5
+        else:
+            win    = expected_score(p.rating, opponent.rating)
+            result = 1 if rng.random() < win else 0
+
+        points[p.pairing_no]        = result
+        points[opponent.pairing_no] = 1 - result
+
+    return [Player(p.name, p.rating, p.title, p.pairing_no,
+                   p.score + points.get(p.pairing_no, 0), p.float_status,
+                   tuple(p.opponents), tuple(Colour(c) for c in p.colour_hist))
+            for p in players if rng.random() >= withdrawal_rate]
+
+def play_tournament(engine, seed, n, rounds, draw_rate=0.3,
+                    withdrawal_rate=0.0, **pair_round_args):
+    """Pair and play a whole tournament, yielding (round_no, input players,
+    paired players, seconds taken by pair_round) for every round."""
+    rng     = random.Random(seed)
+    players = generate_players(rng, n)
+
+    for round_no in range(1, rounds + 1):
+        start   = time.perf_counter()
+        paired  = engine.pair_round(round_no, players,
+                                    last_round=(round_no == rounds),
+                                    **pair_round_args)
+        seconds = time.perf_counter() - start
+        yield round_no, players, paired, seconds
+        players = play_round(rng, paired, draw_rate, withdrawal_rate)
@@ -18,6 +18,7 @@ setup(
     license          = 'MIT',
     keywords         = ['swiss', 'pairing', 'dutch', 'system', 'chess', 'tournament'],
     packages         = ['swissdutch'],
+    python_requires  = '>=3.7',
     classifiers      = [
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
@@ -25,6 +26,12 @@ setup(
         'Topic :: Software Development :: Libraries :: Python Modules',
         'Operating System :: OS Independent',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4'
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12'
     ],
 )
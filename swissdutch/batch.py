@@ -0,0 +1,65 @@
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from swissdutch.dutch import DutchPairingEngine
+
+class PairingJob:
+    """One round of one tournament to be paired by pair_rounds_batch. The
+    engine is created in the worker process as engine(**engine_args), so the
+    class and its arguments, including any top seed colour selection
+    function, must be picklable; pair_round_args are passed on to
+    pair_round."""
+    def __init__(self, round_no, players, last_round=False,
+                 engine=DutchPairingEngine, engine_args=None,
+                 pair_round_args=None):
+        self.round_no        = round_no
+        self.players         = players
+        self.last_round      = last_round
+        self.engine          = engine
+        self.engine_args     = engine_args or {}
+        self.pair_round_args = pair_round_args or {}
+
+    def run(self):
+        engine = self.engine(**self.engine_args)
+        return engine.pair_round(self.round_no, self.players, self.last_round,
+                                 **self.pair_round_args)
+
+class PairingJobError(Exception):
+    """Takes the place of the result of a job that raised. The original
+    exception cannot always be pickled back from the worker, so its type,
+    message and traceback are kept as text."""
+    def __init__(self, index, error, details):
+        super().__init__(index, error, details)
+        self.index   = index
+        self.error   = error
+        self.details = details
+
+    def __str__(self):
+        return 'job {0} failed: {1}'.format(self.index, self.error)
+
+def _run_job(indexed_job):
+    index, job = indexed_job
+    try:
+        return job.run()
+    except Exception as e:
+        return PairingJobError(index, '{0}: {1}'.format(type(e).__name__, e),
+                               traceback.format_exc())
+
+def pair_rounds_batch(jobs, workers=None, chunksize=None):
+    """Pair independent rounds, such as the current rounds of many small
+    tournaments, across a pool of worker processes. Returns one entry per
+    job, in the order of jobs: the players returned by pair_round, or a
+    PairingJobError if the job raised.
+
+    workers defaults to the number of CPUs; with a single worker the jobs
+    run in this process. chunksize is the number of jobs sent to a worker
+    at a time, by default enough for about four chunks per worker."""
+    jobs    = list(enumerate(jobs))
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(jobs) <= 1:
+        return [_run_job(job) for job in jobs]
+
+    chunksize = chunksize or max(1, len(jobs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_run_job, jobs, chunksize=chunksize))
@@ -0,0 +1,255 @@
+import itertools
+import operator
+from swissdutch.swiss import SwissPairingEngine
+from swissdutch.pairing import PairingCriteria, assign_colours, rank_key
+from swissdutch.matching import max_weight_matching
+from swissdutch.constants import Colour, FloatStatus
+
+class _Field:
+    """Stands in for a score bracket holding every player in the round, so
+    that PairingCriteria can be used outside of the Dutch state machine."""
+    def __init__(self, round_no, last_round):
+        self.round_no   = round_no
+        self.odd_round  = round_no % 2
+        self.last_round = last_round
+        self.x          = 0
+
+class BlossomPairingEngine(SwissPairingEngine):
+    """Pairs every round after the first as a single maximum-weight matching
+    over the whole field instead of bracket by bracket.
+
+    Pairs that violate B1a or B2 are never joined by an edge, and the weight
+    of every other pair is built from the quality criteria in order of
+    importance: the score difference, then the colour preference that has to
+    be given up (B4), then repeated floats (B5 and B6), and finally how far
+    the pair is from the S1/S2 split of its score group. Each criterion
+    outweighs the sum of all the criteria below it over a whole round, so
+    the matching optimizes them in that order. When the field is odd a
+    dummy vertex takes the bye, preferring the lowest-ranked player in the
+    lowest score group who may receive it (B1b).
+
+    Only pairs that could plausibly be chosen get an edge: each player is
+    joined to the players around their ideal S1/S2 opponent in their score
+    group, to the players nearest to them in the ranking, which covers the
+    floats to the adjacent groups, and, when B1 rules most of those out, to
+    further players in ranking order until they have NEIGHBOURS possible
+    opponents. The matching runs in O(n^3) time no matter how hard the
+    round is to pair, but with about n * NEIGHBOURS edges rather than n^2 / 2
+    each stage is cheap. Only if the nearby pairs leave someone without a
+    game is the matching run again over every pair.
+
+    The engine only approximates the tie-breaks of the C.x procedure, so its
+    pairings can differ from DutchPairingEngine's."""
+    NEIGHBOURS = 8
+
+    def __init__(self, top_seed_colour_selection_fn=None, bye_value=1,
+                 shallow_copy=False):
+        super().__init__(top_seed_colour_selection_fn, bye_value, shallow_copy)
+
+    def _pair_round(self, rnd):
+        players      = self._rank_by_score(rnd.players)
+        rnd.unpaired = self.pair_players(rnd.round_no, players,
+                                         rnd.last_round)
+        return players
+
+    def pair_players(self, round_no, players, last_round=False):
+        """Pair the given players in place, without copying them first. This
+        lets another engine hand over the players it could not pair. Returns
+        the players left with neither an opponent nor the bye, because B1
+        rules out a game for every one of them."""
+        players  = self._rank_by_score(players)
+        criteria = PairingCriteria(_Field(round_no, last_round))
+        ranks    = self._score_group_ranks(players)
+        n        = len(players)
+
+        edges = self._weighted_edges(players, criteria, ranks,
+                                     self._nearby_pairs(players, criteria,
+                                                        ranks),
+                                     self._bye_candidates(players, criteria))
+        mate  = max_weight_matching(edges, max_cardinality=True)
+
+        if any(mate[ix] == -1 if ix < len(mate) else True
+               for ix in range(n)):
+            edges = self._weighted_edges(players, criteria, ranks,
+                                         itertools.combinations(range(n), 2),
+                                         range(n))
+            mate  = max_weight_matching(edges, max_cardinality=True)
+
+        unpaired = []
+
+        for ix, p1 in enumerate(players):
+            opponent = mate[ix] if ix < len(mate) else -1
+
+            if opponent == -1:
+                unpaired.append(p1)
+            elif opponent == len(players):
+                p1.bye(self._bye_value)
+            elif ix < opponent:
+                assign_colours((p1, players[opponent]))
+
+        return unpaired
+
+    def pair_players_greedily(self, round_no, players, last_round=False):
+        """Pair the given players in place like pair_players, but in one
+        pass in rank order instead of by matching: the lowest-ranked player
+        who may receive the bye gets it, and every other player is paired
+        with the highest-ranked player below them that B1 and B2 allow. This
+        takes O(n^2) time at worst and close to O(n) when B1 rarely gets in
+        the way, so it stands in for the matching when there is no time for
+        it. Returns the players left without a game."""
+        players  = self._rank_by_score(players)
+        criteria = PairingCriteria(_Field(round_no, last_round))
+
+        if len(players) % 2:
+            bye = next((ix for ix in reversed(range(len(players)))
+                        if not players[ix].opponents
+                        or criteria.b1b(players[ix])), None)
+            if bye is not None:
+                players.pop(bye).bye(self._bye_value)
+
+        unpaired = []
+        while players:
+            p1 = players.pop(0)
+            ix = next((ix for ix, p2 in enumerate(players)
+                       if criteria.compatible(p1, p2)), None)
+            if ix is None:
+                unpaired.append(p1)
+            else:
+                assign_colours((p1, players.pop(ix)))
+
+        return unpaired
+
+    @staticmethod
+    def _rank_by_score(players):
+        return sorted(players, key=rank_key)
+
+    @staticmethod
+    def _score_group_ranks(players):
+        """Map each player to their rank within their score group and the
+        size of that group."""
+        ranks = {}
+        for _, group in itertools.groupby(players,
+                                          key=operator.attrgetter('score')):
+            group = list(group)
+            for rank, p in enumerate(group):
+                ranks[id(p)] = (rank, len(group))
+        return ranks
+
+    def _nearby_pairs(self, players, criteria, ranks):
+        """The pairs of positions in players, ranked by score, that are
+        given an edge."""
+        n, d  = len(players), self.NEIGHBOURS
+        pairs = set()
+
+        for i, p in enumerate(players):
+            rank, size = ranks[id(p)]
+            start      = i - rank
+            half       = size // 2
+
+            for j in range(max(i + 1, start + rank + half - d),
+                           min(start + size, start + rank + half + d + 1)):
+                pairs.add((i, j))
+            for j in range(i + 1, min(n, i + d + 1)):
+                pairs.add((i, j))
+
+        degree = [0] * n
+        pairs  = {(i, j) for i, j in pairs
+                  if criteria.compatible(players[i], players[j])}
+        for i, j in pairs:
+            degree[i] += 1
+            degree[j] += 1
+
+        for i in range(n):
+            distance = 1
+            while degree[i] < d and (i - distance >= 0 or i + distance < n):
+                for j in (i - distance, i + distance):
+                    pair = (min(i, j), max(i, j))
+                    if (0 <= j < n and pair not in pairs
+                        and criteria.compatible(players[i], players[j])):
+                        pairs.add(pair)
+                        degree[i] += 1
+                        degree[j] += 1
+                distance += 1
+
+        return sorted(pairs)
+
+    def _bye_candidates(self, players, criteria):
+        """The positions of the lowest-ranked players who may receive the
+        bye, which are the only ones the bye is offered to."""
+        if not len(players) % 2:
+            return []
+
+        candidates = [i for i in reversed(range(len(players)))
+                      if not players[i].opponents or criteria.b1b(players[i])]
+        return candidates[:2 * self.NEIGHBOURS + 1]
+
+    def _weighted_edges(self, players, criteria, ranks, pairs, bye_candidates):
+        n          = len(players)
+        max_pairs  = n // 2 + 1
+        max_diff   = round(2 * max(p.score for p in players)) + 1
+
+        # Maximum cost of a single pair for each criterion, most important
+        # first: score difference, colour, floats, and S1/S2 rank distance,
+        # which stops counting beyond the nearby pairs.
+        max_costs  = (max_diff ** 2, 3, 3, 2 * self.NEIGHBOURS + 2)
+        multiplier = 1
+        weights    = []
+        for max_cost in reversed(max_costs):
+            weights.insert(0, multiplier)
+            multiplier *= max_pairs * max_cost + 1
+
+        def weight(costs):
+            return multiplier - sum(c * w for c, w in zip(costs, weights))
+
+        def rank_capped(costs):
+            return costs[:-1] + (min(costs[-1], max_costs[-1]),)
+
+        edges = []
+        for i, j in pairs:
+            p1, p2 = players[i], players[j]
+            if criteria.compatible(p1, p2):
+                edges.append((i, j, weight(rank_capped(
+                    self._pair_costs(p1, p2, criteria, ranks)))))
+
+        if n % 2:
+            bye = n
+            for i in bye_candidates:
+                p = players[i]
+                if not p.opponents or criteria.b1b(p):
+                    edges.append((i, bye, weight(rank_capped(
+                        self._bye_costs(p, n, ranks)))))
+
+        return edges
+
+    @staticmethod
+    def _pair_costs(p1, p2, criteria, ranks):
+        score_diff = round(abs(2 * p1.score - 2 * p2.score))
+
+        colour = 0
+        if (p1.expected_colour != Colour.none
+            and p1.expected_colour == p2.expected_colour):
+            colour = 1 + min(abs(p1.colour_preference),
+                             abs(p2.colour_preference))
+
+        floats = ((0 if criteria.b5(p1, p2) else 2)
+                  + (0 if criteria.b6(p1, p2) else 1))
+
+        (r1, size1), (r2, _) = ranks[id(p1)], ranks[id(p2)]
+        if p1.score == p2.score:
+            rank = abs(abs(r1 - r2) - size1 // 2)
+        else:
+            # Float the lowest of the higher group against the highest of
+            # the lower group.
+            rank = (size1 - 1 - r1) + r2
+
+        return (score_diff ** 2, colour, floats, rank)
+
+    @staticmethod
+    def _bye_costs(player, n, ranks):
+        # The bye counts as a downfloat from a score group below everyone.
+        score_diff = round(2 * player.score) + 1
+        floats     = (2 if player.float_status == FloatStatus.down else
+                      1 if player.float_status == FloatStatus.downPrev else 0)
+        rank, size = ranks[id(player)]
+
+        return (score_diff ** 2, 0, floats, size - 1 - rank)
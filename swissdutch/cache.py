@@ -0,0 +1,95 @@
+import os
+import pickle
+import hashlib
+import tempfile
+import threading
+import collections
+
+def state_key(engine, round_no, players, last_round, bye_value,
+              top_seed_colour=None):
+    """A hash of everything the pairings of a round depend on: the engine,
+    the round, the bye value, the top seed's colour if it is drawn in this
+    round, and every field of every player. The order of the players does
+    not matter, as the engines sort them."""
+    fields = sorted(repr((p.name, p.rating, p.title and int(p.title),
+                          p.pairing_no, float(p.score), int(p.float_status),
+                          tuple(p.opponents), tuple(p.colour_hist)))
+                    for p in players)
+    state  = repr((engine, round_no, bool(last_round), float(bye_value),
+                   top_seed_colour and int(top_seed_colour), fields))
+    return hashlib.sha256(state.encode('utf-8')).hexdigest()
+
+class PairingCache:
+    """Keeps the players returned for recently paired rounds, by state_key,
+    evicting the least recently used beyond maxsize. With a directory the
+    results are also pickled there, one file per key, and are found again
+    by any cache using the same directory once they have been evicted from
+    memory or by another process."""
+    def __init__(self, maxsize=1024, directory=None):
+        self._maxsize   = maxsize
+        self._directory = directory
+        self._entries   = collections.OrderedDict()
+        self._lock      = threading.Lock()
+        self.hits       = 0
+        self.misses     = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the players stored for key, or None."""
+        with self._lock:
+            players = self._entries.get(key)
+            if players is not None:
+                self._entries.move_to_end(key)
+
+        if players is None and self._directory:
+            players = self._load(key)
+            if players is not None:
+                self._remember(key, players)
+
+        with self._lock:
+            if players is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return players
+
+    def put(self, key, players):
+        players = tuple(players)
+        self._remember(key, players)
+        if self._directory:
+            self._store(key, players)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, players):
+        with self._lock:
+            self._entries[key] = players
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self._directory, key + '.pickle')
+
+    def _load(self, key):
+        try:
+            with open(self._path(key), 'rb') as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            return None
+
+    def _store(self, key, players):
+        # Write to a temporary file first so that a reader never sees a
+        # partly written result.
+        fd, path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(players, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(path, self._path(key))
@@ -1,28 +1,128 @@
+import time
 import operator
 import itertools
-from swissdutch.swiss import SwissPairingEngine
-from swissdutch.pairing import ScoreBracket, PairingContext
+from swissdutch.swiss import SwissPairingEngine, PairingResult
+from swissdutch.blossom import BlossomPairingEngine
+from swissdutch.stats import PairingStats
+from swissdutch.cache import state_key
+from swissdutch.pairing import (ScoreBracket, PairingContext, PairingBudget,
+                                BudgetExhausted, NoLegalPairing,
+                                ParallelSearch, rank_key)
 
 class DutchPairingEngine(SwissPairingEngine):
-    def __init__(self, top_seed_colour_selection_fn=None, bye_value=1):
-        super().__init__(top_seed_colour_selection_fn, bye_value)
+    # Players left to pair when the budget runs out beyond which they are
+    # paired greedily, as the matching would take too long.
+    FALLBACK_MATCHING_PLAYERS = 100
 
-    def _pair_round(self):
-        score_brackets = self._create_score_brackets()
-        ctx            = PairingContext(self._round_no, self._last_round,
-                                        self._bye_value, score_brackets)
-        for sb in ctx:
-            sb.generate_pairings(ctx)
+    def __init__(self, top_seed_colour_selection_fn=None, bye_value=1,
+                 shallow_copy=False, tracer=None, parallel_workers=0,
+                 parallel_min_players=16, cache=None):
+        """With parallel_workers, the transpositions of score brackets of at
+        least parallel_min_players players are searched on that many worker
+        processes. The pairings are the same as those of the sequential
+        search; call close to stop the workers.
 
-        ctx.finalize_pairings()
+        With a PairingCache, a round whose state has been paired before is
+        answered from the cache. The top seed's colour is then drawn before
+        the first round is looked up, and is part of its key."""
+        super().__init__(top_seed_colour_selection_fn, bye_value, shallow_copy)
+        self._tracer   = tracer
+        self._cache    = cache
+        self._parallel = (ParallelSearch(parallel_workers, parallel_min_players)
+                          if parallel_workers else None)
 
-        return self._players
+    def close(self):
+        if self._parallel:
+            self._parallel.close()
 
-    def _create_score_brackets(self):
-        self._players.sort(key=operator.attrgetter('pairing_no'))
-        self._players.sort(key=operator.attrgetter('score'), reverse=True)
+    def pair_round(self, round_no, players, last_round=False,
+                   time_budget=None, max_steps=None, collect_stats=False,
+                   in_place=False):
+        """Pair a round. If time_budget (in seconds) or max_steps (steps of
+        the C.x state machines) runs out first, the score brackets already
+        paired are kept and the remaining players are paired by
+        BlossomPairingEngine. That engine gives up the same criteria as the
+        C.10 relaxations, in the same order of preference. More than
+        FALLBACK_MATCHING_PLAYERS remaining players are paired greedily in
+        rank order instead, so the round takes time_budget plus at most a
+        matching over that many players or one greedy pass over the rest of
+        the field. The result then has budget_limited set. The matching also
+        pairs what it can when the absolute criteria leave no legal pairing
+        at all, and the players given no game are listed in the result's
+        unpaired.
 
-        return [ScoreBracket(score, players)
-                for score, players 
-                in itertools.groupby(self._players,
+        With collect_stats the result's stats holds a PairingStats with the
+        search counters of each score bracket. If the engine was given a
+        Tracer, the rounds it samples are traced event by event. With
+        in_place the given players are paired themselves rather than copies
+        of them. Rounds paired in place or with collect_stats bypass the
+        cache, and rounds cut short by the budget or leaving players
+        unpaired are not stored in it."""
+        key    = None
+        colour = None
+        if self._cache is not None and not (in_place or collect_stats):
+            colour = self._select_top_seed_colour() if round_no == 1 else None
+            key    = state_key(type(self).__name__, round_no, players,
+                               last_round, self._bye_value, colour)
+            cached = self._cache.get(key)
+            if cached is not None:
+                return PairingResult(self._copy_players(cached))
+
+        rnd        = self._start_round(round_no, players, last_round,
+                                       in_place)
+        rnd.budget = (PairingBudget(time_budget, max_steps)
+                      if time_budget is not None or max_steps is not None
+                      else None)
+        rnd.stats  = PairingStats() if collect_stats else None
+        rnd.trace  = (self._tracer.start_round(round_no, last_round)
+                      if self._tracer else None)
+        rnd.top_seed_colour = colour
+        try:
+            result = self._pair(rnd)
+        finally:
+            if rnd.trace:
+                rnd.trace.end(rnd.budget_limited)
+
+        if key and not (result.budget_limited or result.unpaired):
+            self._cache.put(key, self._copy_players(result))
+        return result
+
+    def _pair_round(self, rnd):
+        score_brackets = self._create_score_brackets(rnd.players)
+        ctx            = PairingContext(rnd.round_no, rnd.last_round,
+                                        self._bye_value, score_brackets,
+                                        rnd.budget, rnd.stats, rnd.trace,
+                                        self._parallel)
+        start          = time.perf_counter()
+        try:
+            for sb in ctx:
+                sb.generate_pairings(ctx)
+        except (BudgetExhausted, NoLegalPairing) as e:
+            rnd.budget_limited = isinstance(e, BudgetExhausted)
+            if rnd.trace:
+                rnd.trace.emit('fallback', players=[p.pairing_no for p
+                                                    in ctx.unfinished_players])
+            ctx.finalize_finished_pairings()
+            players  = ctx.unfinished_players
+            fallback = BlossomPairingEngine(bye_value=self._bye_value)
+            pair     = (fallback.pair_players_greedily
+                        if rnd.budget
+                        and len(players) > self.FALLBACK_MATCHING_PLAYERS
+                        else fallback.pair_players)
+            rnd.unpaired = pair(rnd.round_no, players, rnd.last_round)
+        else:
+            ctx.finalize_pairings()
+        finally:
+            if rnd.stats:
+                rnd.stats.seconds = time.perf_counter() - start
+
+        return rnd.players
+
+    @staticmethod
+    def _create_score_brackets(players):
+        players.sort(key=rank_key)
+
+        return [ScoreBracket(score, group)
+                for score, group
+                in itertools.groupby(players,
                                      key=operator.attrgetter('score'))]
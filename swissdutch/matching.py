@@ -0,0 +1,431 @@
+"""Maximum weight matching in general graphs.
+
+This is Edmonds' blossom algorithm with the primal-dual method of Galil
+(1986), running in O(n^3) time. Edge weights must be integers so that every
+dual variable stays integral.
+"""
+
+def max_weight_matching(edges, max_cardinality=False):
+    """Compute a maximum-weight matching of the graph given by edges, a
+    sequence of (i, j, weight) tuples where i and j are non-negative vertex
+    numbers. If max_cardinality is true only maximum-cardinality matchings
+    are considered. Returns a list mate where mate[v] is the vertex matched
+    to v, or -1 if v is single."""
+    if not edges:
+        return []
+
+    num_edges    = len(edges)
+    num_vertices = 1 + max(max(i, j) for (i, j, _) in edges)
+    max_weight   = max(0, max(wt for (_, _, wt) in edges))
+
+    # endpoint[p] is the vertex at end p of edge p // 2, and neighbend[v]
+    # lists the remote endpoints of the edges incident on v.
+    endpoint  = [edges[p // 2][p % 2] for p in range(2 * num_edges)]
+    neighbend = [[] for _ in range(num_vertices)]
+    for k, (i, j, _) in enumerate(edges):
+        neighbend[i].append(2 * k + 1)
+        neighbend[j].append(2 * k)
+
+    # mate[v] is the remote endpoint of v's matched edge, or -1.
+    mate = num_vertices * [-1]
+
+    # Top-level blossoms are labelled 0 (free), 1 (S) or 2 (T) and
+    # labelend[b] is the endpoint through which b got its label.
+    label    = (2 * num_vertices) * [0]
+    labelend = (2 * num_vertices) * [-1]
+
+    # Blossoms are numbered num_vertices .. 2 * num_vertices - 1 and form a
+    # tree whose leaves are the vertices.
+    inblossom         = list(range(num_vertices))
+    blossom_parent    = (2 * num_vertices) * [-1]
+    blossom_childs    = (2 * num_vertices) * [None]
+    blossom_base      = list(range(num_vertices)) + num_vertices * [-1]
+    blossom_endps     = (2 * num_vertices) * [None]
+    best_edge         = (2 * num_vertices) * [-1]
+    blossom_bestedges = (2 * num_vertices) * [None]
+    unused_blossoms   = list(range(num_vertices, 2 * num_vertices))
+
+    # Vertex duals are stored doubled so that all arithmetic is integral.
+    dualvar    = num_vertices * [max_weight] + num_vertices * [0]
+    allow_edge = num_edges * [False]
+    queue      = []
+
+    def slack(k):
+        i, j, wt = edges[k]
+        return dualvar[i] + dualvar[j] - 2 * wt
+
+    def blossom_leaves(b):
+        if b < num_vertices:
+            yield b
+        else:
+            for t in blossom_childs[b]:
+                if t < num_vertices:
+                    yield t
+                else:
+                    for v in blossom_leaves(t):
+                        yield v
+
+    def assign_label(w, t, p):
+        b = inblossom[w]
+        label[w]    = label[b]    = t
+        labelend[w] = labelend[b] = p
+        best_edge[w] = best_edge[b] = -1
+
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        elif t == 2:
+            # The mate of a T-blossom's base becomes an S-vertex.
+            base = blossom_base[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v, w):
+        """Trace back from v and w to find the base of a new blossom, or -1
+        if the paths end at two different single vertices."""
+        path = []
+        base = -1
+
+        while v != -1 or w != -1:
+            b = inblossom[v]
+            if label[b] & 4:
+                base = blossom_base[b]
+                break
+
+            path.append(b)
+            label[b] = 5
+
+            if labelend[b] == -1:
+                v = -1
+            else:
+                v = endpoint[labelend[b]]
+                b = inblossom[v]
+                v = endpoint[labelend[b]]
+
+            if w != -1:
+                v, w = w, v
+
+        for b in path:
+            label[b] = 1
+
+        return base
+
+    def add_blossom(base, k):
+        v, w, _ = edges[k]
+        bb = inblossom[base]
+        bv = inblossom[v]
+        bw = inblossom[w]
+
+        b = unused_blossoms.pop()
+        blossom_base[b]    = base
+        blossom_parent[b]  = -1
+        blossom_parent[bb] = b
+        blossom_childs[b]  = path  = []
+        blossom_endps[b]   = endps = []
+
+        while bv != bb:
+            blossom_parent[bv] = b
+            path.append(bv)
+            endps.append(labelend[bv])
+            v  = endpoint[labelend[bv]]
+            bv = inblossom[v]
+
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+
+        while bw != bb:
+            blossom_parent[bw] = b
+            path.append(bw)
+            endps.append(labelend[bw] ^ 1)
+            w  = endpoint[labelend[bw]]
+            bw = inblossom[w]
+
+        label[b]    = 1
+        labelend[b] = labelend[bb]
+        dualvar[b]  = 0
+
+        for v in blossom_leaves(b):
+            if label[inblossom[v]] == 2:
+                # T-vertices become S-vertices inside an S-blossom.
+                queue.append(v)
+            inblossom[v] = b
+
+        best_edge_to = (2 * num_vertices) * [-1]
+        for bv in path:
+            if blossom_bestedges[bv] is None:
+                nblists = [[p // 2 for p in neighbend[v]]
+                           for v in blossom_leaves(bv)]
+            else:
+                nblists = [blossom_bestedges[bv]]
+
+            for nblist in nblists:
+                for k in nblist:
+                    i, j, _ = edges[k]
+                    if inblossom[j] == b:
+                        i, j = j, i
+                    bj = inblossom[j]
+                    if (bj != b and label[bj] == 1
+                        and (best_edge_to[bj] == -1
+                             or slack(k) < slack(best_edge_to[bj]))):
+                        best_edge_to[bj] = k
+
+            blossom_bestedges[bv] = None
+            best_edge[bv]         = -1
+
+        blossom_bestedges[b] = [k for k in best_edge_to if k != -1]
+        best_edge[b]         = -1
+        for k in blossom_bestedges[b]:
+            if best_edge[b] == -1 or slack(k) < slack(best_edge[b]):
+                best_edge[b] = k
+
+    def expand_blossom(b, endstage):
+        for s in blossom_childs[b]:
+            blossom_parent[s] = -1
+            if s < num_vertices:
+                inblossom[s] = s
+            elif endstage and dualvar[s] == 0:
+                expand_blossom(s, endstage)
+            else:
+                for v in blossom_leaves(s):
+                    inblossom[v] = s
+
+        if not endstage and label[b] == 2:
+            # Relabel the sub-blossoms from the one through which b got its
+            # label round to the base.
+            entrychild = inblossom[endpoint[labelend[b] ^ 1]]
+            j = blossom_childs[b].index(entrychild)
+            if j & 1:
+                j        -= len(blossom_childs[b])
+                jstep     = 1
+                endptrick = 0
+            else:
+                jstep     = -1
+                endptrick = 1
+
+            p = labelend[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossom_endps[b][j-endptrick] ^ endptrick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allow_edge[blossom_endps[b][j-endptrick] // 2] = True
+                j += jstep
+                p  = blossom_endps[b][j-endptrick] ^ endptrick
+                allow_edge[p // 2] = True
+                j += jstep
+
+            bv = blossom_childs[b][j]
+            label[endpoint[p ^ 1]]    = label[bv]    = 2
+            labelend[endpoint[p ^ 1]] = labelend[bv] = p
+            best_edge[bv] = -1
+
+            j += jstep
+            while blossom_childs[b][j] != entrychild:
+                bv = blossom_childs[b][j]
+                if label[bv] == 1:
+                    j += jstep
+                    continue
+
+                reached = next((v for v in blossom_leaves(bv) if label[v]), None)
+                if reached is not None:
+                    label[reached] = 0
+                    label[endpoint[mate[blossom_base[bv]]]] = 0
+                    assign_label(reached, 2, labelend[reached])
+
+                j += jstep
+
+        label[b]    = labelend[b] = -1
+        blossom_childs[b]    = blossom_endps[b] = None
+        blossom_base[b]      = -1
+        blossom_bestedges[b] = None
+        best_edge[b]         = -1
+        unused_blossoms.append(b)
+
+    def augment_blossom(b, v):
+        t = v
+        while blossom_parent[t] != b:
+            t = blossom_parent[t]
+
+        if t >= num_vertices:
+            augment_blossom(t, v)
+
+        i = j = blossom_childs[b].index(t)
+        if i & 1:
+            j        -= len(blossom_childs[b])
+            jstep     = 1
+            endptrick = 0
+        else:
+            jstep     = -1
+            endptrick = 1
+
+        while j != 0:
+            j += jstep
+            t  = blossom_childs[b][j]
+            p  = blossom_endps[b][j-endptrick] ^ endptrick
+            if t >= num_vertices:
+                augment_blossom(t, endpoint[p])
+            j += jstep
+            t  = blossom_childs[b][j]
+            if t >= num_vertices:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]]     = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+
+        blossom_childs[b] = blossom_childs[b][i:] + blossom_childs[b][:i]
+        blossom_endps[b]  = blossom_endps[b][i:] + blossom_endps[b][:i]
+        blossom_base[b]   = blossom_base[blossom_childs[b][0]]
+
+    def augment_matching(k):
+        v, w, _ = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = inblossom[s]
+                if bs >= num_vertices:
+                    augment_blossom(bs, s)
+                mate[s] = p
+
+                if labelend[bs] == -1:
+                    break
+
+                t  = endpoint[labelend[bs]]
+                bt = inblossom[t]
+                s  = endpoint[labelend[bt]]
+                j  = endpoint[labelend[bt] ^ 1]
+                if bt >= num_vertices:
+                    augment_blossom(bt, j)
+                mate[j] = labelend[bt]
+                p       = labelend[bt] ^ 1
+
+    for _ in range(num_vertices):
+        # Each stage looks for one augmenting path.
+        label[:]                        = (2 * num_vertices) * [0]
+        best_edge[:]                    = (2 * num_vertices) * [-1]
+        blossom_bestedges[num_vertices:] = num_vertices * [None]
+        allow_edge[:]                   = num_edges * [False]
+        queue[:]                        = []
+
+        for v in range(num_vertices):
+            if mate[v] == -1 and label[inblossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+
+                for p in neighbend[v]:
+                    k = p // 2
+                    w = endpoint[p]
+
+                    if inblossom[v] == inblossom[w]:
+                        continue
+
+                    if not allow_edge[k]:
+                        kslack = slack(k)
+                        if kslack <= 0:
+                            allow_edge[k] = True
+
+                    if allow_edge[k]:
+                        if label[inblossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[inblossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w]    = 2
+                            labelend[w] = p ^ 1
+                    elif label[inblossom[w]] == 1:
+                        b = inblossom[v]
+                        if best_edge[b] == -1 or kslack < slack(best_edge[b]):
+                            best_edge[b] = k
+                    elif label[w] == 0:
+                        if best_edge[w] == -1 or kslack < slack(best_edge[w]):
+                            best_edge[w] = k
+
+            if augmented:
+                break
+
+            # No augmenting path yet: adjust the duals by the largest delta
+            # that keeps every slack non-negative.
+            delta_type    = -1
+            delta         = None
+            delta_edge    = None
+            delta_blossom = None
+
+            if not max_cardinality:
+                delta_type = 1
+                delta      = min(dualvar[:num_vertices])
+
+            for v in range(num_vertices):
+                if label[inblossom[v]] == 0 and best_edge[v] != -1:
+                    d = slack(best_edge[v])
+                    if delta_type == -1 or d < delta:
+                        delta      = d
+                        delta_type = 2
+                        delta_edge = best_edge[v]
+
+            for b in range(2 * num_vertices):
+                if (blossom_parent[b] == -1 and label[b] == 1
+                    and best_edge[b] != -1):
+                    d = slack(best_edge[b]) // 2
+                    if delta_type == -1 or d < delta:
+                        delta      = d
+                        delta_type = 3
+                        delta_edge = best_edge[b]
+
+            for b in range(num_vertices, 2 * num_vertices):
+                if (blossom_base[b] >= 0 and blossom_parent[b] == -1
+                    and label[b] == 2
+                    and (delta_type == -1 or dualvar[b] < delta)):
+                    delta         = dualvar[b]
+                    delta_type    = 4
+                    delta_blossom = b
+
+            if delta_type == -1:
+                # Maximum cardinality reached.
+                delta_type = 1
+                delta      = max(0, min(dualvar[:num_vertices]))
+
+            for v in range(num_vertices):
+                if label[inblossom[v]] == 1:
+                    dualvar[v] -= delta
+                elif label[inblossom[v]] == 2:
+                    dualvar[v] += delta
+
+            for b in range(num_vertices, 2 * num_vertices):
+                if blossom_base[b] >= 0 and blossom_parent[b] == -1:
+                    if label[b] == 1:
+                        dualvar[b] += delta
+                    elif label[b] == 2:
+                        dualvar[b] -= delta
+
+            if delta_type == 1:
+                break
+            elif delta_type == 2:
+                allow_edge[delta_edge] = True
+                i, j, _ = edges[delta_edge]
+                if label[inblossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif delta_type == 3:
+                allow_edge[delta_edge] = True
+                i, _, _ = edges[delta_edge]
+                queue.append(i)
+            elif delta_type == 4:
+                expand_blossom(delta_blossom, False)
+
+        if not augmented:
+            break
+
+        # Expand the S-blossoms whose dual has dropped to zero.
+        for b in range(num_vertices, 2 * num_vertices):
+            if (blossom_parent[b] == -1 and blossom_base[b] >= 0
+                and label[b] == 1 and dualvar[b] == 0):
+                expand_blossom(b, True)
+
+    return [endpoint[mate[v]] if mate[v] >= 0 else -1
+            for v in range(num_vertices)]
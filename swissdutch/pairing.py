@@ -1,14 +1,150 @@
 import math
-import itertools
-import operator
-from copy import copy
+import time
+import heapq
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
 from swissdutch.constants import FloatStatus, Colour, ColourPref
+from swissdutch.matching import max_weight_matching
+
+def assign_colours(pair):
+    """Pair both players, giving the player with the stronger colour
+    preference (then the higher score, then the lower pairing number) their
+    expected colour."""
+    p1, p2 = pair
+    if abs(p1.colour_preference) > abs(p2.colour_preference):
+        p1.pair_both(p2, p1.expected_colour)
+    elif abs(p1.colour_preference) < abs(p2.colour_preference):
+        p2.pair_both(p1, p2.expected_colour)
+    elif p1.score > p2.score:
+        p1.pair_both(p2, p1.expected_colour)
+    elif p1.score < p2.score:
+        p2.pair_both(p1, p2.expected_colour)
+    elif p1.pairing_no < p2.pairing_no:
+        p1.pair_both(p2, p1.expected_colour)
+    else:
+        p2.pair_both(p1, p2.expected_colour)
+
+def remove_player(players, player):
+    """Remove player from the list by identity rather than equality, which
+    would compare every field of the players ahead of it."""
+    for ix, p in enumerate(players):
+        if p is player:
+            del players[ix]
+            return
+    raise ValueError('list.remove(x): x not in list')
+
+def rank_key(player):
+    """The order of players within a score bracket: by descending score,
+    then by ascending pairing number."""
+    return (-player.score, player.pairing_no)
+
+def _ranked_position(players, key, after_ties):
+    lo, hi = 0, len(players)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        mid_key = rank_key(players[mid])
+        if key < mid_key or (key == mid_key and not after_ties):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+def insert_ranked(players, player):
+    """Insert player into a list in rank_key order, after any players it
+    ties with, where sorting the list with player appended would put it."""
+    players.insert(_ranked_position(players, rank_key(player), True), player)
+
+def remove_ranked(players, player):
+    """Remove player, by identity, from a list in rank_key order."""
+    key = rank_key(player)
+    for ix in range(_ranked_position(players, key, False), len(players)):
+        if players[ix] is player:
+            del players[ix]
+            return
+        if rank_key(players[ix]) != key:
+            break
+    raise ValueError('list.remove(x): x not in list')
+
+class BudgetExhausted(Exception):
+    """Raised by PairingBudget.spend when the budget has run out."""
+
+class NoLegalPairing(Exception):
+    """Raised when the highest score bracket holds every unpaired player
+    and still cannot be paired, so no pairing meets the absolute criteria."""
+
+class PairingBudget:
+    """Limits the C.x procedure of a round to time_budget seconds and
+    max_steps steps of the score bracket state machines. Either limit may be
+    None."""
+    def __init__(self, time_budget=None, max_steps=None):
+        self._deadline   = (time.perf_counter() + time_budget
+                            if time_budget is not None else None)
+        self._steps_left = max_steps
+
+    def spend(self):
+        if self._steps_left is not None:
+            self._steps_left -= 1
+            if self._steps_left < 0:
+                raise BudgetExhausted()
+
+        self.check()
+
+    def check(self):
+        """Raise BudgetExhausted if the time budget has run out, without
+        spending a step. Called from within the searches that a single step
+        may run."""
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise BudgetExhausted()
+
+    def remaining(self):
+        """The seconds left of the time budget, or None if there is no time
+        budget."""
+        if self._deadline is None:
+            return None
+        return max(0, self._deadline - time.perf_counter())
+
+class BracketCounts:
+    """Running counts over the players of a score bracket, from which the
+    bracket's parameters are derived without scanning its players: how many
+    come from higher brackets, how many expect each colour, and how many of
+    those have only a mild colour preference. The players' scores and
+    colours don't change until the round is finalized, so adding and
+    removing players is all that is needed to keep the counts current."""
+    def __init__(self, score, players=()):
+        self._score = score
+        self.n      = 0
+        self.above  = 0         # players whose score is above the bracket's
+        self.colour = [0, 0, 0] # by expected colour: black, none, white
+        self.mild   = [0, 0, 0] # mild preferences, by expected colour
+
+        for p in players:
+            self.add(p)
+
+    def add(self, player):
+        self._count(player, 1)
+
+    def remove(self, player):
+        self._count(player, -1)
+
+    def _count(self, player, n):
+        colour = player.expected_colour + 1
+
+        self.n              += n
+        self.above          += n * (player.score > self._score)
+        self.colour[colour] += n
+        if player.colour_preference == ColourPref.mild:
+            self.mild[colour] += n
 
 class ScoreBracket:
     def __init__(self, score, players):
         self._score                   = score
         self._all_players             = list(players)
+        self._all_counts              = BracketCounts(score, self._all_players)
+        self._ranked                  = False # _all_players in rank_key order
         self._remaining_players       = None
+        self._remaining_counts        = None
+        self._s2_ranked               = None # S2 in rank_key order
         self._criteria                = PairingCriteria(self)
         self._pairings                = []
         self._bye                     = None
@@ -17,8 +153,13 @@ class ScoreBracket:
         self._exchange_length         = 1
         self._saved_transpositions    = None
         self._incompatible_player     = None
+        self._max_pairs               = None # most pairs B1a and B2 allow
         self._paired_floaters         = False
 
+    @property
+    def score(self):
+        return self._score
+
     @property
     def all_players(self):
         return self._all_players
@@ -48,14 +189,48 @@ class ScoreBracket:
         return self._context.round_no
 
     def generate_pairings(self, ctx):
-        self._context = ctx
-        step = self._c1()
+        self._context         = ctx
+        self._criteria.tracer = ctx.tracer
+        if ctx.stats or ctx.tracer:
+            self._generate_pairings_instrumented(
+                ctx.stats.bracket(self) if ctx.stats else None, ctx.tracer)
+            return
+
+        step = self._c1
         while step:
+            ctx.spend()
             step = step()
 
+    def _generate_pairings_instrumented(self, stats, tracer):
+        start       = time.perf_counter()
+        evaluations = self._criteria.evaluations
+
+        try:
+            step = self._c1
+            while step:
+                self._context.spend()
+                name = step.__name__.lstrip('_')
+                if tracer:
+                    tracer.emit('step', score=self._score, step=name)
+                next_step = step()
+
+                if stats:
+                    stats.steps[name] += 1
+                    if step == self._c7 and next_step == self._c6:
+                        stats.transpositions += 1
+                    elif step == self._c8 and next_step == self._c5:
+                        stats.exchanges += 1
+
+                step = next_step
+        finally:
+            if stats:
+                stats.seconds              += time.perf_counter() - start
+                stats.criteria_evaluations += (self._criteria.evaluations
+                                               - evaluations)
+
     def finalize_pairings(self):
         for pair in self._pairings:
-            self._assign_colours(pair)
+            assign_colours(pair)
 
         if self._bye:
             p = self._bye
@@ -63,16 +238,19 @@ class ScoreBracket:
 
     def add_player(self, player):
         self._all_players.append(player)
+        self._all_counts.add(player)
+        self._ranked = False
 
     def remove_player(self, player):
-        self._all_players.remove(player)
+        remove_player(self._all_players, player)
+        self._all_counts.remove(player)
 
     def can_backtrack(self, player):
-        return player != self._incompatible_player
+        return player is not self._incompatible_player
 
     def backtrack(self, player):
         self._reset()
-        self._all_players.append(player)
+        self.add_player(player)
 
     @property
     def _lsb(self):
@@ -82,15 +260,20 @@ class ScoreBracket:
     def _players(self):
         return self._remaining_players if self._remaining_players else self._all_players
 
+    @property
+    def _counts(self):
+        return (self._remaining_counts if self._remaining_players
+                else self._all_counts)
+
     @property
     def _heterogenous(self):
-        return (any(p.score > self._score for p in self._players)
-                and sum(p.score > self._score for p in self._players) / len(self._players) < 0.5)
+        counts = self._counts
+        return 0 < counts.above and 2 * counts.above < counts.n
 
     @property
     def _majority_expected_colour(self):
-        white = sum(p.expected_colour == Colour.white for p in self._players)
-        black = sum(p.expected_colour == Colour.black for p in self._players)
+        white = self._counts.colour[Colour.white + 1]
+        black = self._counts.colour[Colour.black + 1]
         
         col = Colour.none
         
@@ -107,20 +290,22 @@ class ScoreBracket:
 
     @property
     def _m0(self):
-        return sum(p.score > self._score for p in self._players)
+        return self._counts.above
     
     def _reset(self):
         self._remaining_players       = None
+        self._remaining_counts        = None
         self._pairings                = []
         self._bye                     = None
         self._exchanges               = None
         self._exchange_length         = 1
         self._incompatible_player     = None
+        self._max_pairs               = None
 
     def _calculate_x1(self):
-        white   = sum(p.expected_colour == Colour.white for p in self._players)
-        black   = sum(p.expected_colour == Colour.black for p in self._players)
-        neither = len(self._players) - white - black
+        white   = self._counts.colour[Colour.white + 1]
+        black   = self._counts.colour[Colour.black + 1]
+        neither = self._counts.n - white - black
 
         if white < black:
             white += neither
@@ -134,43 +319,44 @@ class ScoreBracket:
             return self._x1 # only calculate z1 in even rounds
 
         maj_col = self._majority_expected_colour
-        num_var = sum(p.colour_preference == ColourPref.mild 
-                      and p.expected_colour == maj_col 
-                      for p in self._players)
+        num_var = self._counts.mild[maj_col + 1]
         return self._x1 - num_var
 
-    def _assign_colours(self, pair):
-        p1, p2 = pair
-        if abs(p1.colour_preference) > abs(p2.colour_preference):
-            p1.pair_both(p2, p1.expected_colour)
-        elif abs(p1.colour_preference) < abs(p2.colour_preference):
-            p2.pair_both(p1, p2.expected_colour)
-        elif p1.score > p2.score:
-            p1.pair_both(p2, p1.expected_colour)
-        elif p1.score < p2.score:
-            p2.pair_both(p1, p2.expected_colour)
-        elif p1.pairing_no < p2.pairing_no:
-            p1.pair_both(p2, p1.expected_colour)
-        else:
-            p2.pair_both(p1, p2.expected_colour)
+    def _compatibility_graph(self):
+        """Return, for each player in the bracket by id, the players they
+        are compatible with."""
+        players = self._players
+        return {id(p1): [p2 for p2 in players
+                         if p2 is not p1 and self._criteria.compatible(p1, p2)]
+                for p1 in players}
+
+    def _maximum_matching(self, neighbours):
+        """Return the number of pairs in a maximum-cardinality matching of
+        the compatibility graph, along with the players it leaves unpaired
+        in rank_key order."""
+        players = self._players
+        index   = {id(p): ix for ix, p in enumerate(players)}
+        edges   = {(min(ix, index[id(p2)]), max(ix, index[id(p2)]), 1)
+                   for ix, p1 in enumerate(players)
+                   for p2 in neighbours[id(p1)] if id(p2) in index}
+        mate    = max_weight_matching(sorted(edges), max_cardinality=True)
+
+        unpaired = sorted((p for ix, p in enumerate(players)
+                           if ix >= len(mate) or mate[ix] == -1),
+                          key=rank_key)
+        return (len(players) - len(unpaired)) // 2, unpaired
 
     def _c1(self):
-        step = self._c2a
+        step       = self._c2a
+        neighbours = self._compatibility_graph()
 
         for p1 in self._players:
-            compatible = False
-
-            other_players = copy(self._players)
-            other_players.remove(p1)
-
-            for p2 in other_players:
-                if self._criteria.b1a(p1, p2) and self._criteria.b2(p1, p2):
-                    compatible = True
-                    break
+            compatible = bool(neighbours[id(p1)])
 
             if not compatible:
                 player = p1
-                if len(other_players) == 1:
+                if len(self._players) == 2:
+                    p2     = next(p for p in self._players if p is not p1)
                     player = p1 if p1.score >= p2.score else p2
 
                 self._incompatible_player = player
@@ -186,6 +372,19 @@ class ScoreBracket:
 
         if not len(self._players):
             step = None
+        elif step == self._c2a and not self._heterogenous:
+            # Every player has an opponent, but the bracket as a whole may
+            # still not pair. Rather than exhaust every transposition and
+            # exchange to find out, C.12 to C.14 act on the players that a
+            # maximum matching leaves over.
+            self._max_pairs, unpaired = self._maximum_matching(neighbours)
+
+            if (self._lsb and self._max_pairs < self._p0
+                and not self._context.highest_score_bracket):
+                self._incompatible_player = next(
+                    (p for p in unpaired if p.score > self._score),
+                    unpaired[0])
+                step = self._c13
 
         return step
 
@@ -199,7 +398,18 @@ class ScoreBracket:
         self._z1 = self._calculate_z1()
         return self._c3a
 
+    @property
+    def _pairs_exhausted(self):
+        """Whether P1 is as high as the maximum matching found in C.1 of
+        a homogeneous bracket allows, so that no more pairs exist."""
+        return (not self._heterogenous and not self._remaining_players
+                and not self._lsb and self._max_pairs is not None
+                and self._p1 >= self._max_pairs)
+
     def _c3a(self):
+        if self._pairs_exhausted and self._p1 > self._max_pairs:
+            return self._c14a # no p1 pairs exist, so float more players
+
         self._p = self._m1 if self._heterogenous else self._p1
         return self._c3b
 
@@ -233,26 +443,31 @@ class ScoreBracket:
         return self._c4
 
     def _c4(self):
-        self._players.sort(key=operator.attrgetter('pairing_no'))
-        self._players.sort(key=operator.attrgetter('score'), reverse=True)
+        # A remainder is ranked when it is set aside, and the bracket's
+        # players stay ranked until more are added, so they are only sorted
+        # on the first visit after that.
+        if not self._remaining_players and not self._ranked:
+            self._all_players.sort(key=rank_key)
+            self._ranked = True
 
-        self._s1 = self._players[:self._p]
-        self._s2 = self._players[self._p:]
+        self._s1        = self._players[:self._p]
+        self._s2        = self._players[self._p:]
+        self._s2_ranked = self._s2
 
         return self._c5
 
     def _c5(self):
-        self._s1.sort(key=operator.attrgetter('pairing_no'))
-        self._s1.sort(key=operator.attrgetter('score'), reverse=True)
-
-        self._s2.sort(key=operator.attrgetter('pairing_no'))
-        self._s2.sort(key=operator.attrgetter('score'), reverse=True)
+        # S1 is kept in rank_key order throughout, and S2, which C.7
+        # transposes, is restored from the copy kept in order.
+        self._s2 = self._s2_ranked
 
         return self._c6
 
     def _c6(self):
         pairings = [(self._s1[i], self._s2[i]) for i in range(len(self._s1))]
-        unpaired = list(set(self._s1 + self._s2) - set(sum(pairings, ())))
+        paired   = {id(p) for pair in pairings for p in pair}
+        unpaired = list({id(p): p for p in self._s1 + self._s2
+                         if id(p) not in paired}.values())
         bye      = unpaired[0] if len(unpaired) == 1 and self._lsb else None
         floater  = unpaired[0] if not(bye) and len(unpaired) == 1 else None
 
@@ -277,13 +492,21 @@ class ScoreBracket:
                 self._pairings += pairings
                 self._bye       = bye
 
-                if len(unpaired) > 1:
+                if len(unpaired) > 1 and self._pairs_exhausted:
+                    # C.14 has already brought P1 down to the most pairs
+                    # the bracket has, so the rest cannot pair and float.
+                    for p in unpaired:
+                        self._context.downfloat(p)
+                elif len(unpaired) > 1:
                     # Pair remainder
                     self._paired_floaters      = True
                     self._saved_transpositions = self._transpositions
                     self._transpositions       = None
                     self._exchanges            = None
-                    self._remaining_players    = unpaired
+                    self._remaining_players    = sorted(unpaired,
+                                                        key=rank_key)
+                    self._remaining_counts     = BracketCounts(self._score,
+                                                               unpaired)
                     self._p                    = self._p1 - self._m1
                     self._x                    = self._x1
                     step                       = self._c4
@@ -294,80 +517,137 @@ class ScoreBracket:
 
     def _c7(self):
         if not self._transpositions:
-            self._transpositions = itertools.permutations(self._s2)
-            next(self._transpositions) # skip 1st one since it's equal to current self._s2
+            # The current self._s2 has already been tried, so the
+            # transpositions start with the one that follows it.
+            self._transpositions = Transpositions(self._s1, self._s2, 
+                                                  self._criteria,
+                                                  colours=True,
+                                                  budget=self._context.budget)
+        elif not self._transpositions.tried(self._s1, self._s2):
+            self._transpositions.rebase(self._s1)
 
         step = self._c6
 
         try:
-            self._s2 = list(next(self._transpositions))
+            self._s2 = self._next_transposition()
         except StopIteration: # no more transpositions
+            self._s2             = self._transpositions.last or self._s2
             self._transpositions = None
             step = self._c10a if self._heterogenous else self._c8
 
         return step
 
+    def _next_transposition(self):
+        parallel = self._context.parallel
+        if (not parallel or len(self._players) < parallel.min_players
+            or len(self._s1) > len(self._s2)
+            or len({id(p) for p in self._s1 + self._s2})
+               < len(self._s1) + len(self._s2)):
+            return next(self._transpositions)
+
+        if self._lsb:
+            def unpaired_ok(p):
+                return not p.opponents or self._criteria.b1b(p)
+        else:
+            alt_floaters = any(self._criteria.b5(p) and self._criteria.b6(p)
+                               and self._context.can_downfloat(p)
+                               for p in self._players)
+            def unpaired_ok(p):
+                return (self._criteria.b5(p) and self._criteria.b6(p)
+                        and (self._context.can_downfloat(p)
+                             or not alt_floaters))
+
+        return self._transpositions.search(parallel, self._x,
+                                           unpaired_ok)
+
     @staticmethod
-    def _generate_exchanges(s1, s2, n):
-        s1_subsets = sorted(itertools.combinations(s1, r=n),
-                            key=lambda players: sum(p.pairing_no for p in players),
-                            reverse=True)
-        s1_subsets.sort(key=lambda players: sum(p.score for p in players), 
-                        reverse=True)
-        s2_subsets = sorted(itertools.combinations(s2, r=n),
-                            key=lambda players: sum(p.pairing_no for p in players))
-        s2_subsets.sort(key=lambda players: sum(p.score for p in players))
-        end_s1_subsets = len(s1_subsets) - 1
-        end_s2_subsets = len(s2_subsets) - 1
-
-        def diff(s1sub, s2sub): 
-            return abs(sum(p.score for p in s1sub) - sum(p.score for p in s2sub))
-
-        exchanges = []
-        if not(s1_subsets) or not(s2_subsets):
-            return exchanges
-
-        min_diff = diff(s1_subsets[0], s2_subsets[0])
-        max_diff = diff(s1_subsets[-1], s2_subsets[-1])
+    def _ordered_subsets(players, n, key):
+        """Yield the n-player subsets of players in ascending order of the
+        element-wise sum of key over their members, ties broken by the order
+        in which itertools.combinations would produce them.
+
+        Subsets are positions in players sorted by key. Each subset is
+        reached from exactly one parent by moving one position up, and the
+        positions are only moved right to left, so the heap holds just the
+        frontier of the enumeration."""
+        m = len(players)
+        if n > m:
+            return
+
+        basis = sorted(range(m), key=lambda ix: (key(players[ix]), ix))
+        keys  = [key(players[ix]) for ix in basis]
+
+        def entry(positions, last_moved):
+            total   = tuple(sum(k) for k in zip(*(keys[p] for p in positions)))
+            members = tuple(sorted(basis[p] for p in positions))
+            return (total, members, positions, last_moved)
+
+        frontier = [entry(tuple(range(n)), n - 1)]
+        while frontier:
+            _, members, positions, last_moved = heapq.heappop(frontier)
+            yield tuple(players[ix] for ix in members)
+
+            for j in range(last_moved + 1):
+                limit = positions[j+1] if j + 1 < n else m
+                if positions[j] + 1 < limit:
+                    child = positions[:j] + (positions[j] + 1,) + positions[j+1:]
+                    heapq.heappush(frontier, entry(child, j))
+
+    @classmethod
+    def _generate_exchanges(cls, s1, s2, n, budget=None):
+        """Yield (s1_subset, s2_subset) exchanges of n players in order of
+        increasing difference between their score sums. S1 subsets are taken
+        highest scores and pairing numbers first, and S2 subsets lowest
+        first. Many pairs of subsets may be passed over between two
+        exchanges, so a PairingBudget given as budget is checked for each."""
+        s1, s2 = tuple(s1), tuple(s2) # the brackets change as we go
+        if n > len(s1) or n > len(s2):
+            return
+
+        def s1_subsets():
+            return cls._ordered_subsets(s1, n, 
+                                        lambda p: (-p.score, -p.pairing_no))
+        def s2_subsets():
+            return cls._ordered_subsets(s2, n,
+                                        lambda p: (p.score, p.pairing_no))
+
+        s1_scores = sorted(p.score for p in s1)
+        s2_scores = sorted(p.score for p in s2)
+        min_diff  = abs(sum(s1_scores[-n:]) - sum(s2_scores[:n]))
+        max_diff  = abs(sum(s1_scores[:n]) - sum(s2_scores[-n:]))
 
         delta = min_diff
-        i = 0
-        k = 0
-
         while delta <= max_diff:
-            if delta == diff(s1_subsets[i], s2_subsets[k]):
-                exchanges.append( (s1_subsets[i], s2_subsets[k]) )
-            if k < end_s2_subsets:
-                k += 1
-                continue
-            if i < end_s1_subsets:
-                i += 1
-                k = 0
-                continue
-            delta += 1
-            i = 0
-            k = 0
+            for s1_subset in s1_subsets():
+                s1_score = sum(p.score for p in s1_subset)
 
-        return exchanges
+                for s2_subset in s2_subsets():
+                    if budget:
+                        budget.check()
 
-    def _c8(self):
-        step = self._c5
+                    s2_score = sum(p.score for p in s2_subset)
 
-        if self._exchanges == None:
-            self._s1.sort(key=operator.attrgetter('pairing_no'), reverse=True)
-            self._s1.sort(key=operator.attrgetter('score'))
+                    if s2_score > s1_score + delta:
+                        break # S2 subsets come in ascending score order
+                    if abs(s1_score - s2_score) == delta:
+                        yield (s1_subset, s2_subset)
 
-            self._s2.sort(key=operator.attrgetter('pairing_no'))
-            self._s2.sort(key=operator.attrgetter('score'), reverse=True)
+            delta += 1
 
-            self._exchanges = self._generate_exchanges(self._s1, self._s2,
-                                                       self._exchange_length)
+    def _c8(self):
+        step = self._c5
+
+        if self._exchanges is None:
+            self._exchanges = self._generate_exchanges(self._s1[::-1],
+                                                       self._s2_ranked,
+                                                       self._exchange_length,
+                                                       self._context.budget)
         
         exchange = None
 
         try:
-            exchange = self._exchanges.pop(0)
-        except IndexError: # no more exchanges (for this subset size)
+            exchange = next(self._exchanges)
+        except StopIteration: # no more exchanges (for this subset size)
             self._exchanges = None
             self._exchange_length += 1
 
@@ -375,25 +655,31 @@ class ScoreBracket:
                 # We've exhausted all possible exchanges
                 self._exchange_length = 1
                 self._remaining_players = None
+                self._remaining_counts  = None
                 step = self._c9 if self._heterogenous else self._c10a
             else:
                 step = self._c8 # generate another set of exchanges
         else:
             s1_subset, s2_subset = exchange
             for player in s1_subset:
-                self._s1.remove(player)
-                self._s2.append(player)
+                remove_ranked(self._s1, player)
+                insert_ranked(self._s2_ranked, player)
             for player in s2_subset:
-                self._s2.remove(player)
-                self._s1.append(player)
+                remove_ranked(self._s2_ranked, player)
+                insert_ranked(self._s1, player)
 
         return step
 
     def _c9(self):
         self._pairings       = []
-        self._transpositions = self._saved_transpositions
         self._s1             = self._players[:self._p]
         self._s2             = self._players[self._p:]
+        self._s2_ranked      = self._s2
+        self._transpositions = (self._saved_transpositions
+                                or Transpositions(self._s1, self._s2,
+                                                  self._criteria, resume=True,
+                                                  colours=True,
+                                                  budget=self._context.budget))
         self._p              = self._p1
         self._x              = self._x1
         return self._c7
@@ -472,6 +758,8 @@ class ScoreBracket:
             if self._context.can_backtrack(player):
                 self._context.backtrack(player)
                 self._incompatible_player = None
+            elif self._context.highest_score_bracket:
+                raise NoLegalPairing()
             else:
                 self._context.collapse_previous_score_bracket()
                 self._incompatible_player = None
@@ -510,15 +798,680 @@ class ScoreBracket:
 
         return step
 
+class Transpositions:
+    """Iterates over the transpositions of S2 in the order given by D.1.
+
+    Transpositions are built board by board, and as soon as a board pairs
+    two players that violate B1a, B2, B5 or B6 every transposition sharing
+    that prefix is skipped. With colours, so is every prefix with more than
+    x boards pairing players who expect the same colour, which C.6 would
+    reject under B4. Transpositions that differ only in the order of
+    the players left unpaired by S1 yield the same pairings, so only the
+    first of them is produced, unless the bracket has changed since the
+    previous transposition was tried.
+
+    When a board runs out of choices the search jumps straight back to the
+    latest board that took one of the S2 players it could have had or, if
+    the colour limit was in the way, that paired two players expecting the
+    same colour. Changing any board in between cannot help. Boards whose
+    prefix has already produced a transposition step back one at a time,
+    as C.6 may have rejected it for any of them.
+
+    A single transposition may take a long search to reach, so a
+    PairingBudget given as budget is checked for every choice tried."""
+    def __init__(self, s1, s2, criteria, resume=False, colours=False,
+                 budget=None):
+        self._s1       = s1
+        self._s2       = list(s2)
+        self._criteria = criteria
+        self._colours  = colours
+        self._budget   = budget
+        self._order    = list(range(len(self._s2)))
+        self._clashes  = [0]  # same-colour boards before each board
+        self._resume   = resume
+        self._checked  = False
+        self._tried    = (tuple(s1), tuple(s2))
+        self._floor    = 0    # boards below the floor keep their choice
+        self._first    = None # S2 index the first board must start with
+        self.last      = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        found = False
+        first = self._first
+        final = list(reversed(range(len(self._order))))
+        moved = self._order != final
+
+        if self._resume:
+            self._resume = False
+            found = self._next_tail()
+        elif first is not None:
+            self._first = None
+            found       = self._first_prefix(first)
+
+        if not found and (first is not None or not self._next_prefix()):
+            # Every remaining transposition was skipped; S2 ends up in the
+            # last one just as if they had all been tried.
+            self._order = final
+            self.last   = [self._s2[i] for i in final] if moved else None
+            raise StopIteration
+
+        s2          = [self._s2[i] for i in self._order]
+        self._tried = (tuple(self._s1), tuple(s2))
+        return s2
+
+    def tried(self, s1, s2):
+        """Whether s1 and s2 are the last transposition produced."""
+        last_s1, last_s2 = self._tried
+        return (len(s1) == len(last_s1) and len(s2) == len(last_s2)
+                and all(a is b for a, b in zip(s1, last_s1))
+                and all(a is b for a, b in zip(s2, last_s2)))
+
+    def rebase(self, s1):
+        """Continue with the transposition that follows the last one produced, 
+        pairing it against a new S1."""
+        self._s1      = s1
+        self._resume  = True
+        self._checked = False
+        return self
+
+    @property
+    def _boards(self):
+        return min(len(self._s1), len(self._s2))
+
+    def _fits(self, board, ix):
+        return self._criteria.pairable(self._s1[board], self._s2[ix])
+
+    def _clash(self, board, ix):
+        return self._criteria.clash(self._s1[board], self._s2[ix])
+
+    def _spare(self, board):
+        """How many of the boards from board on may still pair players who
+        expect the same colour, or None if there is no limit."""
+        if not self._colours:
+            return None
+        return self._criteria.x - self._clashes[board]
+
+    def _count(self, board):
+        """Record the choice of board in the running count of boards that
+        pair players who expect the same colour. The counts of later boards
+        are stale until they are counted again."""
+        if self._colours:
+            self._clashes[board+1] = (self._clashes[board]
+                                      + self._clash(board, self._order[board]))
+
+    def _recount(self):
+        """Count the clashes of the current prefix from scratch, as S1 or
+        the order may have changed since the last search."""
+        self._clashes = [0] * (self._boards + 1)
+        for board in range(self._boards):
+            self._count(board)
+
+    def _first_illegal(self):
+        spare = self._criteria.x if self._colours else None
+
+        for board in range(self._boards):
+            ix = self._order[board]
+            if not self._fits(board, ix):
+                return board
+            if spare is not None:
+                spare -= self._clash(board, ix)
+                if spare < 0:
+                    return board
+
+        return None
+
+    def _next_choice(self, board, start, used):
+        if self._budget:
+            self._budget.check()
+
+        spare = self._spare(board)
+        return next((ix for ix in range(start, len(self._s2))
+                     if ix not in used and self._fits(board, ix)
+                     and (spare is None or self._clash(board, ix) <= spare)),
+                    None)
+
+    def _culprits(self, board):
+        """The boards before board whose choices keep it from having any
+        of the S2 players left."""
+        order    = self._order
+        culprits = {b for b in range(board) if self._fits(board, order[b])}
+
+        spare = self._spare(board)
+        if spare is not None and spare < 1:
+            culprits.update(b for b in range(board)
+                            if self._clash(b, order[b]))
+        return culprits
+
+    def _jump(self, board, used, chrono, conflicts):
+        """Return the board to try next once board has run out of choices,
+        releasing the players of the boards that are skipped. Boards up to
+        chrono step back one at a time; conflicts holds, for the others,
+        the culprits passed on by later boards that ran out of choices."""
+        if board <= chrono:
+            return board - 1
+
+        culprits = conflicts.pop(board, set()) | self._culprits(board)
+        target   = max(culprits, default=-1)
+
+        for b in range(target + 1, board):
+            used.discard(self._order[b])
+        if target >= 0:
+            culprits.discard(target)
+            conflicts.setdefault(target, set()).update(culprits)
+
+        return target
+
+    def _next_tail(self):
+        k     = self._boards
+        order = self._order
+
+        if self._first_illegal() is not None:
+            return False
+
+        self._checked = True
+
+        tail = order[k:]
+        i    = len(tail) - 2
+        while i >= 0 and tail[i] > tail[i+1]:
+            i -= 1
+
+        if i < 0:
+            return False
+
+        j = len(tail) - 1
+        while tail[j] < tail[i]:
+            j -= 1
+
+        tail[i], tail[j] = tail[j], tail[i]
+        tail[i+1:]       = reversed(tail[i+1:])
+        order[k:]        = tail
+        return True
+
+    def _next_prefix(self):
+        k     = self._boards
+        order = self._order
+        board = k - 1
+
+        if not self._checked:
+            # Nothing may follow a board of the current prefix that 
+            # has never been checked and turns out to be illegal.
+            illegal = self._first_illegal()
+            board   = board if illegal is None else illegal
+
+        self._recount()
+        used = set(order[:board+1])
+        return self._advance(board, used, board, {})
+
+    def _first_prefix(self, first):
+        if not self._fits(0, first) or (self._colours 
+                                        and self._clash(0, first)
+                                        > self._criteria.x):
+            return False
+
+        self._recount()
+        self._order[0] = first
+        self._count(0)
+        used           = {first}
+        board          = self._fill(1, used)
+
+        if board == self._boards:
+            return self._finish(used)
+
+        conflicts = {}
+        board     = self._jump(board, used, 0, conflicts)
+        return self._advance(board, used, 0, conflicts)
+
+    def _advance(self, board, used, chrono, conflicts):
+        """Move on to the next legal prefix, changing board and, once its
+        choices run out, the boards before it down to the floor."""
+        order = self._order
+
+        while board >= self._floor:
+            used.discard(order[board])
+            ix = self._next_choice(board, order[board] + 1, used)
+
+            if ix is None:
+                board = self._jump(board, used, chrono, conflicts)
+                continue
+
+            order[board] = ix
+            self._count(board)
+            used.add(ix)
+            chrono = min(chrono, board)
+            for later in [b for b in conflicts if b > board]:
+                del conflicts[later]
+
+            board = self._fill(board + 1, used)
+
+            if board == self._boards:
+                return self._finish(used)
+
+            board = self._jump(board, used, chrono, conflicts)
+
+        return False
+
+    def _fill(self, board, used):
+        """Give each board from board on its first legal choice. Returns
+        the first board left without one."""
+        while board < self._boards:
+            ix = self._next_choice(board, 0, used)
+            if ix is None:
+                break
+            self._order[board] = ix
+            self._count(board)
+            used.add(ix)
+            board += 1
+
+        return board
+
+    def _finish(self, used):
+        self._order[self._boards:] = sorted(set(range(len(self._order)))
+                                            - used)
+        self._checked = True
+        return True
+
+    def split(self):
+        """Divide the transpositions that remain into subspaces, one for
+        each S2 player that can still take the first board, in the order in
+        which they would be produced. Each subspace is a Transpositions over
+        S1 and S2 positions rather than players, checked against a matrix of
+        pairable verdicts, so that it can be searched in another process."""
+        k, m    = self._boards, len(self._s2)
+        rows    = [bytes(self._fits(board, ix) for ix in range(m))
+                   for board in range(k)]
+        clashes = None
+        if self._colours:
+            clashes = [bytes(self._clash(board, ix) for ix in range(m))
+                       for board in range(k)]
+        matrix  = _PairableMatrix(rows, clashes,
+                                  self._criteria.x if self._colours else None)
+        s1, s2  = list(range(k)), list(range(m))
+
+        current          = Transpositions(s1, s2, matrix, self._resume,
+                                          self._colours)
+        current._order   = list(self._order)
+        current._checked = self._checked
+        current._floor   = 1
+        subspaces        = [current]
+
+        for first in range(self._order[0] + 1, m):
+            if rows[0][first]:
+                subspace        = Transpositions(s1, s2, matrix,
+                                                 colours=self._colours)
+                subspace._first = first
+                subspace._floor = 1
+                subspaces.append(subspace)
+
+        return subspaces
+
+    def search(self, parallel, x, unpaired_ok):
+        """Return the next transposition that C.6 would accept, searching
+        the subspaces from split in parallel on the workers of a
+        ParallelSearch. The earliest subspace to find one wins, so the
+        result is the one the sequential search would reach, and the
+        iterator continues from it. Raises StopIteration, leaving S2 in the
+        last transposition, if there is none. unpaired_ok tells whether an
+        S2 player may be left unpaired.
+
+        The subspaces are searched within what is left of the budget, and
+        those still running once the result is known are cancelled, so that
+        they don't hold up the workers."""
+        subspaces = self.split()
+        if len(subspaces) < 2:
+            return next(self)
+
+        k       = self._boards
+        clashes = [bytes(self._s1[board].expected_colour == p.expected_colour
+                         for p in self._s2)
+                   for board in range(k)]
+        unpaired = ([bool(unpaired_ok(p)) for p in self._s2]
+                    if len(self._s2) - k == 1 else None)
+
+        seconds = self._budget.remaining() if self._budget else None
+        cancel  = parallel.cancel_event()
+        futures = [parallel.executor.submit(search_subspace, subspace,
+                                            clashes, x, unpaired, seconds,
+                                            cancel)
+                   for subspace in subspaces]
+        last    = self._order
+        try:
+            for future in futures:
+                found, tried = self._result(future)
+                if found is not None:
+                    return self.seek(found)
+                last = tried or last
+        finally:
+            cancel.set()
+            for future in futures:
+                future.cancel()
+
+        return self.exhaust(last)
+
+    def _result(self, future):
+        """Wait for the result of a subspace search for no longer than the
+        budget allows. A subspace stopped by the budget finds nothing, so
+        the budget is checked again once it has returned."""
+        if not self._budget:
+            return future.result()
+
+        try:
+            result = future.result(timeout=self._budget.remaining())
+        except TimeoutError:
+            raise BudgetExhausted()
+
+        self._budget.check()
+        return result
+
+    def seek(self, order):
+        """Continue from the given transposition, found by searching a
+        subspace, as if it had just been produced."""
+        self._order   = list(order)
+        self._resume  = False
+        self._checked = True
+        s2            = [self._s2[i] for i in self._order]
+        self._tried   = (tuple(self._s1), tuple(s2))
+        return s2
+
+    def exhaust(self, order):
+        """Finish as if every transposition up to and including the given
+        one had been tried, and raise StopIteration."""
+        self._order  = list(order)
+        self._resume = False
+        self._first  = None
+        self._floor  = len(self._order) # nothing is left to advance
+        return next(self)
+
+class _PairableMatrix:
+    """Stands in for PairingCriteria in a subspace returned by
+    Transpositions.split."""
+    def __init__(self, rows, clashes=None, x=None):
+        self._rows    = rows
+        self._clashes = clashes
+        self.x        = x
+
+    def pairable(self, board, ix):
+        return self._rows[board][ix]
+
+    def clash(self, board, ix):
+        return self._clashes[board][ix]
+
+class _SubspaceBudget:
+    """Stops a subspace search once seconds have passed or cancel has been
+    set. cancel lives in another process, so it is only looked at every
+    poll seconds."""
+    def __init__(self, seconds, cancel, poll=0.02):
+        now            = time.perf_counter()
+        self._deadline = now + seconds if seconds is not None else None
+        self._cancel   = cancel
+        self._poll     = poll
+        self._next     = now + poll
+
+    def check(self):
+        now = time.perf_counter()
+        if self._deadline is not None and now > self._deadline:
+            raise BudgetExhausted()
+        if self._cancel is not None and now > self._next:
+            self._next = now + self._poll
+            if self._cancel.is_set():
+                raise BudgetExhausted()
+
+def search_subspace(subspace, clashes, x, unpaired_ok, seconds=None,
+                    cancel=None):
+    """Return the first transposition of the subspace that C.6 would
+    accept, or None, along with the last transposition produced. A
+    transposition is accepted if at most x boards pair players expecting
+    the same colour (clashes holds a row of flags per board) and, when one
+    S2 player is left unpaired, unpaired_ok allows that player to be. The
+    search gives up, finding nothing, after seconds or once the cancel
+    event is set."""
+    k    = len(clashes)
+    last = None
+
+    subspace._budget = _SubspaceBudget(seconds, cancel)
+    try:
+        for order in subspace:
+            last = order
+            if (sum(clashes[board][order[board]] for board in range(k)) <= x
+                and (unpaired_ok is None or unpaired_ok[order[k]])):
+                return order, last
+    except BudgetExhausted:
+        pass
+
+    return None, last
+
+class CompatibilityMatrix:
+    """Remembers the verdict of a pairwise criterion for every pair of 
+    players in a score bracket. Players are given a bracket-local index the
+    first time they are seen and each row is a bytearray indexed by the
+    opponent's local index, so a verdict is only computed once."""
+    UNKNOWN = 0
+    FAILED  = 1
+    PASSED  = 2
+
+    def __init__(self, criterion, inherited=None):
+        self._criterion  = criterion
+        self._inherited  = inherited
+        self._index      = {}
+        self._rows       = []
+        self.evaluations = 0 # verdicts actually computed
+
+    def __call__(self, p1, p2):
+        row = self._rows[self.index(p1)]
+        ix  = self.index(p2)
+
+        if ix >= len(row):
+            row.extend(bytes(len(self._rows) - len(row)))
+
+        verdict = row[ix]
+        if verdict == self.UNKNOWN and self._inherited:
+            verdict = row[ix] = self._inherited(p1, p2)
+        if verdict == self.UNKNOWN:
+            self.evaluations += 1
+            verdict = row[ix] = (self.PASSED if self._criterion(p1, p2)
+                                 else self.FAILED)
+
+        return verdict == self.PASSED
+
+    def known(self, p1, p2):
+        """The verdict remembered for p1 and p2, without computing it."""
+        i = self._index.get(id(p1))
+        j = self._index.get(id(p2))
+
+        if i is None or j is None or j >= len(self._rows[i]):
+            return self.UNKNOWN
+        return self._rows[i][j]
+
+    def index(self, player):
+        ix = self._index.get(id(player))
+
+        if ix is None:
+            ix = self._index[id(player)] = len(self._rows)
+            self._rows.append(bytearray())
+
+        return ix
+
+class VerdictCache:
+    """Keeps a CompatibilityMatrix for each setting of the criteria that a
+    pairwise criterion depends on, a tuple of flags that are true while the
+    criteria they stand for are enforced. Disabling a criterion can only let
+    more pairs pass, so a pair that passed under one setting passes under
+    any that enforces no more, and a pair that failed fails under any that
+    enforces at least as much. A matrix takes such verdicts from the others
+    rather than computing them again."""
+    def __init__(self, criterion):
+        self._criterion = criterion
+        self._matrices  = {}
+
+    def matrix(self, setting):
+        matrix = self._matrices.get(setting)
+
+        if matrix is None:
+            matrix = self._matrices[setting] = CompatibilityMatrix(
+                self._criterion,
+                lambda p1, p2: self._inherit(setting, p1, p2))
+
+        return matrix
+
+    @property
+    def evaluations(self):
+        return sum(m.evaluations for m in self._matrices.values())
+
+    def _inherit(self, setting, p1, p2):
+        for other, matrix in self._matrices.items():
+            if other == setting:
+                continue
+
+            verdict = matrix.known(p1, p2)
+            if (verdict == CompatibilityMatrix.PASSED
+                and all(o >= s for o, s in zip(other, setting))):
+                return verdict
+            if (verdict == CompatibilityMatrix.FAILED
+                and all(o <= s for o, s in zip(other, setting))):
+                return verdict
+
+        return CompatibilityMatrix.UNKNOWN
+
+class BoardVerdicts:
+    """Remembers, for each board of the last pairings checked, whether the
+    pair is pairable and whether both players expect the same colour, along
+    with running totals of both. Consecutive candidates usually differ only
+    in their last few boards, so only the boards whose players changed are
+    re-evaluated."""
+    def __init__(self, pairable):
+        self._pairable = pairable
+        self._boards   = []
+        self.failed    = 0 # boards that aren't pairable
+        self.violated  = 0 # boards where a colour preference isn't met
+
+    def update(self, pairings):
+        boards = self._boards
+
+        for ix, (p1, p2) in enumerate(pairings):
+            if ix < len(boards):
+                q1, q2, failed, violated = boards[ix]
+                if q1 is p1 and q2 is p2:
+                    continue
+                self.failed   -= failed
+                self.violated -= violated
+
+            board = (p1, p2, not self._pairable(p1, p2),
+                     p1.expected_colour == p2.expected_colour)
+            self.failed   += board[2]
+            self.violated += board[3]
+
+            if ix < len(boards):
+                boards[ix] = board
+            else:
+                boards.append(board)
+
+        for _, _, failed, violated in boards[len(pairings):]:
+            self.failed   -= failed
+            self.violated -= violated
+        del boards[len(pairings):]
+
 class PairingCriteria:
     def __init__(self, score_bracket):
-        self._score_bracket              = score_bracket
-        self.b5_enabled_for_downfloaters = True
-        self.b5_enabled_for_upfloaters   = True
-        self.b6_enabled_for_downfloaters = True
-        self.b6_enabled_for_upfloaters   = True
-        self.a7d_enabled                 = True
-        self.b2_enabled_for_top_scorers  = True
+        self._score_bracket               = score_bracket
+        self._b5_enabled_for_downfloaters = True
+        self._b5_enabled_for_upfloaters   = True
+        self._b6_enabled_for_downfloaters = True
+        self._b6_enabled_for_upfloaters   = True
+        self._a7d_enabled                 = True
+        self._b2_enabled_for_top_scorers  = True
+        self.tracer                       = None
+        self._compatible_verdicts         = VerdictCache(
+            lambda p1, p2: self.b1a(p1, p2) and self.b2(p1, p2))
+        self._pairable_verdicts           = VerdictCache(
+            lambda p1, p2: (self.compatible(p1, p2) and self.b5(p1, p2)
+                            and self.b6(p1, p2)))
+        self._select_verdicts()
+
+    @property
+    def b5_enabled_for_downfloaters(self):
+        return self._b5_enabled_for_downfloaters
+
+    @b5_enabled_for_downfloaters.setter
+    def b5_enabled_for_downfloaters(self, enabled):
+        if enabled != self._b5_enabled_for_downfloaters:
+            self._b5_enabled_for_downfloaters = enabled
+            self._relaxed('b5_enabled_for_downfloaters', enabled)
+
+    @property
+    def b5_enabled_for_upfloaters(self):
+        return self._b5_enabled_for_upfloaters
+
+    @b5_enabled_for_upfloaters.setter
+    def b5_enabled_for_upfloaters(self, enabled):
+        if enabled != self._b5_enabled_for_upfloaters:
+            self._b5_enabled_for_upfloaters = enabled
+            self._relaxed('b5_enabled_for_upfloaters', enabled)
+
+    @property
+    def b6_enabled_for_downfloaters(self):
+        return self._b6_enabled_for_downfloaters
+
+    @b6_enabled_for_downfloaters.setter
+    def b6_enabled_for_downfloaters(self, enabled):
+        if enabled != self._b6_enabled_for_downfloaters:
+            self._b6_enabled_for_downfloaters = enabled
+            self._relaxed('b6_enabled_for_downfloaters', enabled)
+
+    @property
+    def b6_enabled_for_upfloaters(self):
+        return self._b6_enabled_for_upfloaters
+
+    @b6_enabled_for_upfloaters.setter
+    def b6_enabled_for_upfloaters(self, enabled):
+        if enabled != self._b6_enabled_for_upfloaters:
+            self._b6_enabled_for_upfloaters = enabled
+            self._relaxed('b6_enabled_for_upfloaters', enabled)
+
+    @property
+    def a7d_enabled(self):
+        return self._a7d_enabled
+
+    @a7d_enabled.setter
+    def a7d_enabled(self, enabled):
+        if enabled != self._a7d_enabled:
+            self._a7d_enabled = enabled
+            self._relaxed('a7d_enabled', enabled)
+
+    @property
+    def b2_enabled_for_top_scorers(self):
+        return self._b2_enabled_for_top_scorers
+
+    @b2_enabled_for_top_scorers.setter
+    def b2_enabled_for_top_scorers(self, enabled):
+        if enabled != self._b2_enabled_for_top_scorers:
+            self._b2_enabled_for_top_scorers = enabled
+            self._relaxed('b2_enabled_for_top_scorers', enabled)
+
+    def _relaxed(self, criterion, enabled):
+        if self.tracer:
+            self.tracer.emit('relax', score=self._score_bracket.score,
+                             criterion=criterion, enabled=enabled)
+        self._select_verdicts()
+
+    @property
+    def evaluations(self):
+        """The number of pairwise verdicts computed so far."""
+        return (self._compatible_verdicts.evaluations
+                + self._pairable_verdicts.evaluations)
+
+    def _select_verdicts(self):
+        # B1a and B2 only depend on A7d and the B2 exception for top
+        # scorers, and pairs only on the upfloater halves of B5 and B6.
+        compatible_setting = (self._a7d_enabled,
+                              self._b2_enabled_for_top_scorers)
+        pairable_setting   = compatible_setting + (
+            self._b5_enabled_for_upfloaters, self._b6_enabled_for_upfloaters)
+
+        self._compatible = self._compatible_verdicts.matrix(compatible_setting)
+        self._pairable   = self._pairable_verdicts.matrix(pairable_setting)
+        self._boards     = BoardVerdicts(self.pairable)
 
     def b1a(self, p1, p2):
         """p1 and p2 may not be paired if they have met before."""
@@ -569,27 +1522,84 @@ class PairingCriteria:
                     if p2 and self.b6_enabled_for_upfloaters else True)
         return t1() and t2()
 
+    def compatible(self, p1, p2):
+        """p1 and p2 may be paired if B1a and B2 hold for them."""
+        return self._compatible(p1, p2)
+
+    def pairable(self, p1, p2):
+        """p1 and p2 may be paired if B1a, B2, B5 and B6 all hold for them."""
+        return self._pairable(p1, p2)
+
+    def clash(self, p1, p2):
+        """Whether pairing p1 and p2 counts against B4, as they expect the
+        same colour."""
+        return p1.expected_colour == p2.expected_colour
+
+    @property
+    def x(self):
+        return self._score_bracket.x
+
     def satisfied(self, pairings, downfloater, bye):
+        self._boards.update(pairings)
         def t1():
-            return all(self.b1a(p1, p2) and self.b2(p1, p2) and self.b5(p1, p2)
-                       and self.b6(p1, p2) for (p1, p2) in pairings)
-        def t2(): 
-            return self.b4(pairings) if pairings else True
+            return not self._boards.failed
+        def t2():
+            return self._boards.violated <= self._score_bracket.x
         def t3():
             return self.b5(downfloater) and self.b6(downfloater) if downfloater else True
         def t4():
            return self.b1b(bye) if bye else True
         return t1() and t2() and t3() and t4()
 
+class ParallelSearch:
+    """Searches the transpositions of score brackets with at least
+    min_players players on a pool of worker processes, split by the S2
+    player on the first board. The pool is started on first use."""
+    def __init__(self, workers, min_players=16):
+        self._workers    = workers
+        self._executor   = None
+        self._manager    = None
+        self._lock       = threading.Lock()
+        self.min_players = min_players
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self._workers)
+            return self._executor
+
+    def cancel_event(self):
+        """A new event with which a search stops the subspace searches it
+        no longer needs."""
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager.Event()
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+
 class PairingContext:
-    def __init__(self, round_no, last_round, bye_value, score_brackets):
+    def __init__(self, round_no, last_round, bye_value, score_brackets,
+                 budget=None, stats=None, tracer=None, parallel=None):
         self._ix             = 0
         self._round_no       = round_no
         self._last_round     = last_round
         self._bye_value      = bye_value
         self._score_brackets = score_brackets
-        self._downfloaters   = []
-        self._backtrackers   = []
+        self._budget         = budget
+        self._stats          = stats
+        self._tracer         = tracer
+        self._parallel       = parallel
+        self._downfloaters   = set() # ids of players who have downfloated
+        self._backtrackers   = set() # ids of players who have backtracked
 
     def __iter__(self):
         return self
@@ -614,46 +1624,104 @@ class PairingContext:
     def bye_value(self):
         return self._bye_value
 
+    @property
+    def budget(self):
+        return self._budget
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def tracer(self):
+        return self._tracer
+
+    @property
+    def parallel(self):
+        return self._parallel
+
+    @property
+    def highest_score_bracket(self):
+        return self._index == 0
+
     @property
     def lowest_score_bracket(self):
         return self._index == len(self._score_brackets) - 1
 
     def collapse_current_score_bracket(self):
+        if self._stats:
+            self._stats.collapses += 1
+        if self._tracer:
+            self._tracer.emit('collapse',
+                              score=self._current_score_bracket.score,
+                              into=self._next_score_bracket.score)
         for p in self._current_score_bracket.all_players:
             self._next_score_bracket.add_player(p)
         self._score_brackets.remove(self._current_score_bracket)
         self._ix -= 1
 
     def collapse_previous_score_bracket(self):
+        if self._stats:
+            self._stats.collapses += 1
+        if self._tracer:
+            self._tracer.emit('collapse',
+                              score=self._previous_score_bracket.score,
+                              into=self._current_score_bracket.score)
         for p in self._previous_score_bracket.all_players:
             self._current_score_bracket.add_player(p)
         self._score_brackets.remove(self._previous_score_bracket)
         self._ix -= 1
 
     def can_downfloat(self, player):
-        return (player not in self._downfloaters
+        return (id(player) not in self._downfloaters
                 and not self.lowest_score_bracket)
 
     def downfloat(self, player):
-        self._downfloaters.append(player)
+        if self._tracer:
+            self._tracer.emit('downfloat',
+                              score=self._current_score_bracket.score,
+                              player=player.pairing_no)
+        self._downfloaters.add(id(player))
         self._current_score_bracket.remove_player(player)
         self._next_score_bracket.add_player(player)
 
     def can_backtrack(self, player):
-        return (player not in self._backtrackers
+        return (id(player) not in self._backtrackers
                 and self._index != 0
                 and self._previous_score_bracket.can_backtrack(player))
 
     def backtrack(self, player):
-        self._backtrackers.append(player)
+        if self._stats:
+            self._stats.backtracks += 1
+        if self._tracer:
+            self._tracer.emit('backtrack',
+                              score=self._current_score_bracket.score,
+                              player=player.pairing_no)
+        self._backtrackers.add(id(player))
         self._current_score_bracket.remove_player(player)
         self._previous_score_bracket.backtrack(player)
         self._ix -= 2
 
+    def spend(self):
+        if self._budget:
+            self._budget.spend()
+
     def finalize_pairings(self):
         for sb in self._score_brackets:
             sb.finalize_pairings()
 
+    def finalize_finished_pairings(self):
+        """Finalize the score brackets above the current one, which have
+        been paired completely."""
+        for sb in self._score_brackets[:self._index]:
+            sb.finalize_pairings()
+
+    @property
+    def unfinished_players(self):
+        """The players in the current and lower score brackets."""
+        return [p for sb in self._score_brackets[self._index:]
+                for p in sb.all_players]
+
     @property
     def _current_score_bracket(self):
         return self._score_brackets[self._index]
@@ -1,6 +1,17 @@
+from array import array
 from swissdutch.constants import FloatStatus, Colour, ColourPref
 
 class Player:
+    """A player's record. Opponents' pairing numbers and the colours played
+    are kept in compact array buffers that grow in place with each game.
+    The opponents and colour_hist properties return them as tuples, of
+    pairing numbers and of Colours, built when first asked for and kept
+    until the next game is added."""
+    __slots__ = ('_name', '_rating', '_title', '_pairing_no', '_score',
+                 '_float_status', '_opponents', '_colour_hist',
+                 '_opponents_view', '_colour_hist_view', '_colour_diff',
+                 '_last_colours', '_colour_pref', '_expected_colour')
+
     def __init__(self, name, rating, title=None, pairing_no=None,
                  score=0, float_status=FloatStatus.none, opponents=(),
                  colour_hist=()):
@@ -10,8 +21,18 @@ class Player:
         self._pairing_no   = pairing_no
         self._score        = score
         self._float_status = float_status
-        self._opponents    = opponents
-        self._colour_hist  = colour_hist
+        self._opponents    = array('i', opponents)
+        self._colour_hist  = array('b', colour_hist)
+
+        # Running totals from which the colour preference is derived, and
+        # the values derived from them, cleared whenever a game is added.
+        self._colour_diff      = sum(colour_hist)
+        self._last_colours     = tuple(c for c in colour_hist
+                                       if c != Colour.none)[-2:]
+        self._colour_pref      = None
+        self._expected_colour  = None
+        self._opponents_view   = None
+        self._colour_hist_view = None
 
     def __eq__(self, other):
         return (self._name == other.name
@@ -20,17 +41,43 @@ class Player:
                 and self._pairing_no == other.pairing_no
                 and self._score == other.score
                 and self._float_status == other.float_status
-                and self._opponents == other.opponents
-                and self._colour_hist == other.colour_hist
+                and self.opponents == other.opponents
+                and self.colour_hist == other.colour_hist
                 if isinstance(other, Player) else NotImplemented)
 
     def __repr__(self):
         return ('sn:{0}, r:{1}, t:{2}, pn:{3}, s:{4}, f:{5}, op:{6}, ch:{7}'
             .format(self._name, self._rating, self._title, self._pairing_no,
-                    self._score, self._float_status, self._opponents, self._colour_hist))
+                    self._score, self._float_status, tuple(self._opponents),
+                    tuple(Colour(c) for c in self._colour_hist)))
+
+    def __copy__(self):
+        """Clone the player. Every field other than the game history is
+        immutable and can be shared, so only the history buffers are
+        copied."""
+        clone = object.__new__(type(self))
+        for slot in Player.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        if hasattr(self, '__dict__'):
+            clone.__dict__.update(self.__dict__)
+
+        clone._opponents   = array('i', self._opponents)
+        clone._colour_hist = array('b', self._colour_hist)
+        return clone
+
+    def __reduce__(self):
+        # Pickle as constructor arguments rather than the slot dictionary,
+        # which would repeat every slot name for every player.
+        args = (self._name, self._rating, self._title, self._pairing_no,
+                self._score, self._float_status, tuple(self._opponents),
+                tuple(self._colour_hist))
+        state = getattr(self, '__dict__', None)
+        return (type(self), args, state) if state else (type(self), args)
 
     def __hash__(self):
-        return hash(repr(self))
+        return hash((self._name, self._rating, self._title, self._pairing_no,
+                     self._score, self._float_status, tuple(self._opponents),
+                     tuple(self._colour_hist)))
 
     @property
     def name(self):
@@ -62,37 +109,48 @@ class Player:
 
     @property
     def colour_hist(self):
-        return self._colour_hist
+        if self._colour_hist_view is None:
+            self._colour_hist_view = tuple(Colour(c)
+                                           for c in self._colour_hist)
+        return self._colour_hist_view
 
     @property
     def opponents(self):
-        return self._opponents
+        if self._opponents_view is None:
+            self._opponents_view = tuple(self._opponents)
+        return self._opponents_view
 
     @property
     def colour_preference(self):
-        cd  = sum(self._colour_hist)
-        cd2 = sum([c for c in self._colour_hist if c != Colour.none][-2:])
-        cp  = max(cd, cd2)
-        return ColourPref(cp)
+        if self._colour_pref is None:
+            cd  = self._colour_diff
+            cd2 = sum(self._last_colours)
+            cp  = max(cd, cd2)
+            self._colour_pref = ColourPref(cp)
+
+        return self._colour_pref
 
     @property
     def expected_colour(self):
-        col  = Colour.none
-        pref = self.colour_preference
-
-        if pref > 0:
-            col = Colour.black
-        elif pref < 0:
-            col = Colour.white
-        else:
-            last_col = next((c for c in reversed(self._colour_hist)
-                             if c != Colour.none), Colour.none)
-            if last_col == Colour.white:
+        if self._expected_colour is None:
+            col  = Colour.none
+            pref = self.colour_preference
+
+            if pref > 0:
                 col = Colour.black
-            elif last_col == Colour.black:
+            elif pref < 0:
                 col = Colour.white
+            else:
+                last_col = (self._last_colours[-1] if self._last_colours
+                            else Colour.none)
+                if last_col == Colour.white:
+                    col = Colour.black
+                elif last_col == Colour.black:
+                    col = Colour.white
+
+            self._expected_colour = col
 
-        return col
+        return self._expected_colour
 
     def pair_both(self, opponent, colour):
         opp_col = Colour.black if colour == Colour.white else Colour.white
@@ -100,8 +158,8 @@ class Player:
         opponent.pair(self, opp_col)
 
     def pair(self, opponent, colour):
-        self._opponents += (opponent.pairing_no,)
-        self._colour_hist += (colour,)
+        self._opponents.append(opponent.pairing_no)
+        self._add_colour(colour)
 
         float_stat = FloatStatus.none
 
@@ -113,11 +171,15 @@ class Player:
         self._set_float_status(float_stat)
 
     def bye(self, bye_value):
-        self._opponents += (0,)
-        self._colour_hist += (Colour.none,)
+        self._opponents.append(0)
+        self._add_colour(Colour.none)
         self._float_status = FloatStatus.down
         self._score += bye_value
 
+    def add_points(self, points):
+        """Add the points scored in the last game to the player's score."""
+        self._score += points
+
     def _set_float_status(self, float_status):
         if float_status != FloatStatus.none:
             self._float_status = float_status
@@ -126,4 +188,16 @@ class Player:
         if self._float_status < 0:
             self._float_status += 1
         elif self._float_status > 0:
-            self._float_status -= 1
\ No newline at end of file
+            self._float_status -= 1
+
+    def _add_colour(self, colour):
+        self._colour_hist.append(colour)
+        self._colour_diff += colour
+
+        if colour != Colour.none:
+            self._last_colours = self._last_colours[-1:] + (colour,)
+
+        self._colour_pref      = None
+        self._expected_colour  = None
+        self._opponents_view   = None
+        self._colour_hist_view = None
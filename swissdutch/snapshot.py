@@ -0,0 +1,169 @@
+"""A compact binary snapshot of a player table.
+
+A snapshot is a fixed header followed by one column per Player field,
+each padded to 8 bytes:
+
+    header          magic, format version, players, games, name bytes
+    scores          float64 per player
+    ratings         int32 per player
+    pairing_nos     int32 per player, 0 for none
+    game_offsets    uint32 per player, plus one: where each player's games
+                    start in opponents and colour_hist
+    name_offsets    uint32 per player, plus one, into names
+    titles          int8 per player, an index into TITLES
+    float_statuses  int8 per player
+    opponents       int32 per game
+    colour_hist     int8 per game
+    names           UTF-8
+
+All numbers are little-endian. The column sizes follow from the counts in
+the header, so a Snapshot can map the file and expose each column as a
+memoryview of the mapping, and build Players only for the entries that
+are asked for.
+"""
+import sys
+import mmap
+import struct
+from array import array
+from swissdutch.constants import FideTitle, FloatStatus
+from swissdutch.player import Player
+
+MAGIC   = b'SWDS'
+VERSION = 1
+HEADER  = struct.Struct('<4sHHIII')
+TITLES  = (None, 0) + tuple(FideTitle)
+
+_COLUMNS = (('scores', 'd'), ('ratings', 'i'), ('pairing_nos', 'i'),
+            ('game_offsets', 'I'), ('name_offsets', 'I'), ('titles', 'b'),
+            ('float_statuses', 'b'), ('opponents', 'i'),
+            ('colour_hist', 'b'), ('names', 'B'))
+
+def _column_lengths(n, games, name_bytes):
+    return (n, n, n, n + 1, n + 1, n, n, games, games, name_bytes)
+
+def _padding(size):
+    return -size % 8
+
+def write_snapshot(file, players):
+    """Write a snapshot of players to a binary file."""
+    players = list(players)
+    names   = [p.name.encode('utf-8') for p in players]
+    columns = {'scores':         array('d', (p.score for p in players)),
+               'ratings':        array('i', (p.rating for p in players)),
+               'pairing_nos':    array('i', (p.pairing_no or 0
+                                             for p in players)),
+               'game_offsets':   array('I', [0]),
+               'name_offsets':   array('I', [0]),
+               'titles':         array('b', (TITLES.index(p.title)
+                                             for p in players)),
+               'float_statuses': array('b', (p.float_status
+                                             for p in players)),
+               'opponents':      array('i'),
+               'colour_hist':    array('b'),
+               'names':          array('B', b''.join(names))}
+
+    for p, name in zip(players, names):
+        columns['opponents'].extend(p.opponents)
+        columns['colour_hist'].extend(p.colour_hist)
+        columns['game_offsets'].append(len(columns['opponents']))
+        columns['name_offsets'].append(columns['name_offsets'][-1]
+                                       + len(name))
+
+    header = HEADER.pack(MAGIC, VERSION, 0, len(players),
+                         len(columns['opponents']), len(columns['names']))
+    file.write(header + bytes(_padding(len(header))))
+
+    for name, _ in _COLUMNS:
+        column = columns[name]
+        if sys.byteorder != 'little':
+            column.byteswap()
+        data = column.tobytes()
+        file.write(data + bytes(_padding(len(data))))
+
+class Snapshot:
+    """A player table read from a snapshot in a buffer, such as the mapping
+    made by Snapshot.open. The columns are memoryviews of that buffer, which
+    must be treated as read-only and not kept beyond close."""
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._view   = memoryview(buffer)
+        self._views  = []
+
+        magic, version, _, n, games, name_bytes = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError('not a player table snapshot')
+        if version != VERSION:
+            raise ValueError('unsupported snapshot version {0}'
+                             .format(version))
+
+        self._n  = n
+        offset   = HEADER.size + _padding(HEADER.size)
+        lengths  = _column_lengths(n, games, name_bytes)
+
+        for (name, typecode), length in zip(_COLUMNS, lengths):
+            size = length * array(typecode).itemsize
+            setattr(self, name, self._column(offset, size, typecode))
+            offset += size + _padding(size)
+
+    @classmethod
+    def open(cls, path):
+        """Map the snapshot file at path without reading it into memory."""
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def _column(self, offset, size, typecode):
+        view = self._view[offset:offset + size]
+        self._views.append(view)
+
+        if typecode == 'B':
+            return view
+        if sys.byteorder != 'little':
+            column = array(typecode, view.tobytes())
+            column.byteswap()
+            return column
+
+        column = view.cast(typecode)
+        self._views.append(column)
+        return column
+
+    def close(self):
+        for view in reversed(self._views):
+            if isinstance(view, memoryview):
+                view.release()
+        self._view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._n
+
+    def name(self, i):
+        return bytes(self.names[self.name_offsets[i]:
+                                self.name_offsets[i + 1]]).decode('utf-8')
+
+    def games(self, i):
+        """The opponents and colours of entry i, as views of the columns."""
+        start, end = self.game_offsets[i], self.game_offsets[i + 1]
+        return self.opponents[start:end], self.colour_hist[start:end]
+
+    def player(self, i):
+        opponents, colour_hist = self.games(i)
+        return Player(self.name(i), self.ratings[i], TITLES[self.titles[i]],
+                      self.pairing_nos[i] or None, self._score(i),
+                      FloatStatus(self.float_statuses[i]), opponents,
+                      colour_hist)
+
+    @property
+    def players(self):
+        return [self.player(i) for i in range(self._n)]
+
+    def _score(self, i):
+        score = self.scores[i]
+        return int(score) if score == int(score) else score
@@ -0,0 +1,46 @@
+import collections
+
+class BracketStats:
+    """Search counters for one score bracket. A bracket that is paired more
+    than once, e.g. after a backtrack, accumulates its counters."""
+    def __init__(self, score):
+        self.score                = score
+        self.steps                = collections.Counter() # C-step name -> runs
+        self.transpositions       = 0 # S2 transpositions tried by C.7
+        self.exchanges            = 0 # S1/S2 exchanges made by C.8
+        self.criteria_evaluations = 0 # pairwise criteria verdicts computed
+        self.seconds              = 0.0
+
+    def as_dict(self):
+        return {'score': self.score,
+                'steps': dict(self.steps),
+                'transpositions': self.transpositions,
+                'exchanges': self.exchanges,
+                'criteria_evaluations': self.criteria_evaluations,
+                'seconds': self.seconds}
+
+class PairingStats:
+    """Search counters for one round, collected when pair_round is called
+    with collect_stats=True."""
+    def __init__(self):
+        self.brackets   = [] # BracketStats in the order first visited
+        self.backtracks = 0
+        self.collapses  = 0
+        self.seconds    = 0.0
+        self._by_id     = {}
+
+    def bracket(self, score_bracket):
+        stats = self._by_id.get(id(score_bracket))
+
+        if stats is None:
+            stats = self._by_id[id(score_bracket)] = BracketStats(
+                score_bracket.score)
+            self.brackets.append(stats)
+
+        return stats
+
+    def as_dict(self):
+        return {'brackets': [b.as_dict() for b in self.brackets],
+                'backtracks': self.backtracks,
+                'collapses': self.collapses,
+                'seconds': self.seconds}
@@ -3,42 +3,78 @@ import math
 import random
 import abc
 import copy
+import asyncio
+import functools
 from swissdutch.constants import Colour
 
+class PairingResult(list):
+    """The players returned by pair_round. budget_limited is set when the
+    engine ran out of time or steps and completed the round by a quicker
+    fallback, so the pairings may not be the ones the rules prescribe.
+    stats holds the search counters if the engine was asked to collect
+    them. unpaired lists the players the engine could find neither an
+    opponent nor the bye for; they have no game this round."""
+    def __init__(self, players, budget_limited=False, stats=None,
+                 unpaired=()):
+        super().__init__(players)
+        self.budget_limited = budget_limited
+        self.stats          = stats
+        self.unpaired       = list(unpaired)
+
+class PairingRound:
+    """The state of one call to pair_round. Engines keep everything that
+    varies from round to round here rather than on themselves, so a single
+    engine can pair rounds for several callers at once."""
+    def __init__(self, round_no, players, last_round):
+        self.round_no        = round_no
+        self.players         = players
+        self.last_round      = last_round
+        self.budget_limited  = False
+        self.unpaired        = ()   # players left without a game
+        self.budget          = None # PairingBudget, if any
+        self.stats           = None # PairingStats, if collected
+        self.trace           = None # RoundTrace, if the round is traced
+        self.top_seed_colour = None # drawn when round 1 is paired, if not set
+
 class SwissPairingEngine(metaclass=abc.ABCMeta):
     @staticmethod
     def _select_random_colour():
         return random.choice((Colour.white, Colour.black))
 
-    @abc.abstractclassmethod
-    def __init__(self, top_seed_colour_selection_fn, bye_value):
-        self._bye_value = bye_value
-        self._select_top_seed_colour = staticmethod(top_seed_colour_selection_fn
-                                                    if top_seed_colour_selection_fn 
-                                                    else self._select_random_colour)
+    @abc.abstractmethod
+    def __init__(self, top_seed_colour_selection_fn, bye_value,
+                 shallow_copy=False):
+        self._bye_value    = bye_value
+        self._shallow_copy = shallow_copy
+        self._select_top_seed_colour = (top_seed_colour_selection_fn
+                                        if top_seed_colour_selection_fn
+                                        else self._select_random_colour)
 
     @abc.abstractmethod
-    def _pair_round(self):
+    def _pair_round(self, rnd):
         pass
 
-    def _rank_players(self):
-        self._players.sort(key=operator.attrgetter('name'))
-        self._players.sort(key=operator.attrgetter('rating', 'title'),
-                           reverse=True)
+    @staticmethod
+    def _rank_players(players):
+        players.sort(key=operator.attrgetter('name'))
+        players.sort(key=lambda p: (p.rating, p.title or 0), reverse=True)
 
-    def _assign_pairing_numbers(self):
-        for i in range(len(self._players)):
-            p = self._players[i]
+    @staticmethod
+    def _assign_pairing_numbers(players):
+        for i in range(len(players)):
+            p = players[i]
             p.pairing_no = i + 1
 
-    def _pair_first_round(self):
-        self._rank_players()
-        self._assign_pairing_numbers()
+    def _pair_first_round(self, rnd):
+        players = rnd.players
+        self._rank_players(players)
+        self._assign_pairing_numbers(players)
 
-        k          = math.floor(len(self._players)/2)
-        s1         = self._players[:k]
-        s2         = self._players[k:]
-        odd_colour = self._select_top_seed_colour()
+        k          = math.floor(len(players)/2)
+        s1         = players[:k]
+        s2         = players[k:]
+        odd_colour = (rnd.top_seed_colour if rnd.top_seed_colour is not None
+                      else self._select_top_seed_colour())
 
         while s1:
             p1       = s1.pop(0)
@@ -49,12 +85,38 @@ class SwissPairingEngine(metaclass=abc.ABCMeta):
         if s2:
             s2[0].bye(self._bye_value)
 
-        return self._players
+        return players
+
+    def _copy_players(self, players):
+        """The engine pairs copies of the players so that the caller's
+        objects are never modified. With shallow_copy each player is copied
+        with copy.copy, which for Player only duplicates the game history;
+        subclasses holding other mutable state need the default deepcopy."""
+        return ([copy.copy(p) for p in players] if self._shallow_copy
+                else list(copy.deepcopy(players)))
+
+    def _start_round(self, round_no, players, last_round, in_place=False):
+        players = list(players) if in_place else self._copy_players(players)
+        return PairingRound(round_no, players, last_round)
+
+    def _pair(self, rnd):
+        players = (self._pair_first_round(rnd)
+                   if rnd.round_no == 1 else self._pair_round(rnd))
+        return PairingResult(players, rnd.budget_limited, rnd.stats,
+                             rnd.unpaired)
 
-    def pair_round(self, round_no, players, last_round=False):
-        self._round_no   = round_no
-        self._players    = list(copy.deepcopy(players))
-        self._last_round = last_round
+    def pair_round(self, round_no, players, last_round=False, in_place=False):
+        """Pair a round. With in_place the given players are paired
+        themselves rather than copies of them."""
+        return self._pair(self._start_round(round_no, players, last_round,
+                                            in_place))
 
-        return (self._pair_first_round()
-                if self._round_no == 1 else self._pair_round())
+    async def pair_round_async(self, round_no, players, last_round=False,
+                               executor=None, **options):
+        """Run pair_round on executor, or the event loop's default executor,
+        so that pairing does not block the event loop. options are passed on
+        to pair_round."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(self.pair_round, round_no, players,
+                                        last_round, **options))
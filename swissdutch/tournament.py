@@ -0,0 +1,125 @@
+import copy
+import bisect
+from swissdutch.dutch import DutchPairingEngine
+
+class Tournament:
+    """A tournament's player table, kept from one round to the next.
+
+    The tournament has its engine pair its own players in place, so each
+    round's games, colours and floats are added to the existing records
+    rather than every player being copied, history and all, for every
+    round. The players are also filed in score groups, by pairing number,
+    which are updated as results are recorded, so each round is handed to
+    the engine already in score bracket order.
+
+    rounds_played lets a tournament be resumed from players who already
+    have pairing numbers and results."""
+    def __init__(self, players, rounds, engine=None, rounds_played=0):
+        self._rounds   = rounds
+        self._round_no = rounds_played
+        self._engine   = engine or DutchPairingEngine()
+        self._awaiting = False
+        self._entrants = list(copy.deepcopy(players))
+        self._players  = {} # pairing no -> player
+        self._scores   = {} # pairing no -> the score it is filed under
+        self._groups   = {} # score -> sorted pairing numbers
+
+        if rounds_played:
+            self._index(self._entrants)
+
+    @property
+    def rounds(self):
+        return self._rounds
+
+    @property
+    def round_no(self):
+        """The last round paired."""
+        return self._round_no
+
+    @property
+    def players(self):
+        """The players by descending score, then by pairing number. These
+        are the tournament's own records and should be treated as
+        read-only."""
+        if not self._players:
+            return list(self._entrants)
+
+        return [self._players[n]
+                for score in sorted(self._groups, reverse=True)
+                for n in self._groups[score]]
+
+    def player(self, pairing_no):
+        return self._players[pairing_no]
+
+    def score_group(self, score):
+        return [self._players[n] for n in self._groups.get(score, ())]
+
+    def pair_next_round(self, **options):
+        """Pair the next round and return the engine's result, which holds
+        the tournament's own players. options are passed on to the engine's
+        pair_round."""
+        if self._awaiting:
+            raise ValueError('the results of round {0} have not been recorded'
+                             .format(self._round_no))
+        if self._round_no >= self._rounds:
+            raise ValueError('all {0} rounds have been paired'
+                             .format(self._rounds))
+
+        round_no = self._round_no + 1
+        paired   = self._engine.pair_round(round_no, self.players,
+                                           last_round=(round_no == self._rounds),
+                                           in_place=True, **options)
+        self._round_no = round_no
+        self._awaiting = True
+
+        if round_no == 1 and not self._players:
+            self._index(paired)
+        else:
+            for p in paired:
+                if len(p.opponents) == round_no and not p.opponents[-1]:
+                    self._refile(p) # scored for the bye
+
+        return paired
+
+    def record_results(self, results):
+        """Add the results of the round just paired. results maps pairing
+        numbers to the points scored; players who had the bye have been
+        scored already and are left out, as are players who did not play."""
+        if not self._awaiting:
+            raise ValueError('round {0} has no results to record'
+                             .format(self._round_no + 1))
+
+        for pairing_no, points in results.items():
+            p = self._players[pairing_no]
+            p.add_points(points)
+            self._refile(p)
+
+        self._awaiting = False
+
+    def withdraw(self, pairing_no):
+        """Leave the player out of the rounds still to be paired."""
+        del self._players[pairing_no]
+        self._unfile(pairing_no, self._scores.pop(pairing_no))
+
+    def _index(self, players):
+        self._players = {p.pairing_no: p for p in players}
+        self._scores  = {p.pairing_no: p.score for p in players}
+        self._groups  = {}
+
+        for n in sorted(self._players):
+            self._groups.setdefault(self._scores[n], []).append(n)
+
+    def _refile(self, player):
+        n     = player.pairing_no
+        score = self._scores[n]
+
+        if score != player.score:
+            self._unfile(n, score)
+            self._scores[n] = player.score
+            bisect.insort(self._groups.setdefault(player.score, []), n)
+
+    def _unfile(self, pairing_no, score):
+        group = self._groups[score]
+        del group[bisect.bisect_left(group, pairing_no)]
+        if not group:
+            del self._groups[score]
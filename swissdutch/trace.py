@@ -0,0 +1,104 @@
+import collections
+import itertools
+import json
+import random
+import threading
+
+class Tracer:
+    """Sends structured events describing the pairing search to a sink,
+    which is any callable taking an event dict. Every event has a sequence
+    number, the id of the traced round it belongs to, and an event type;
+    the remaining fields depend on the type:
+
+        round     round_no, last_round
+        step      score, step         (a C-step of a score bracket ran)
+        relax     score, criterion, enabled
+        downfloat score, player       (the player's pairing number)
+        backtrack score, player
+        collapse  score, into
+        fallback  players             (left to the fallback by the budget)
+        done      round_no, budget_limited
+
+    Only a sample_rate fraction of rounds is traced, and every event of a
+    traced round is emitted, so a traced round can be followed step by step
+    from its events even when rounds are paired concurrently."""
+    def __init__(self, sink, sample_rate=1.0, seed=None):
+        self._sink        = sink
+        self._sample_rate = sample_rate
+        self._random      = random.Random(seed)
+        self._lock        = threading.Lock()
+        self._seq         = itertools.count()
+        self._trace_ids   = itertools.count()
+
+    def start_round(self, round_no, last_round):
+        """Return a RoundTrace for the round if it is sampled, else None."""
+        with self._lock:
+            if self._random.random() >= self._sample_rate:
+                return None
+            trace = RoundTrace(self, next(self._trace_ids), round_no)
+
+        trace.emit('round', round_no=round_no, last_round=last_round)
+        return trace
+
+    def _emit(self, fields):
+        with self._lock:
+            fields['seq'] = next(self._seq)
+            self._sink(fields)
+
+class RoundTrace:
+    """Emits the events of one traced round."""
+    def __init__(self, tracer, trace_id, round_no):
+        self._tracer   = tracer
+        self._trace_id = trace_id
+        self._round_no = round_no
+
+    def emit(self, event, **fields):
+        fields['event'] = event
+        fields['trace'] = self._trace_id
+        self._tracer._emit(fields)
+
+    def end(self, budget_limited):
+        self.emit('done', round_no=self._round_no,
+                  budget_limited=budget_limited)
+
+class JsonLinesSink:
+    """Writes each event as one line of JSON to a file, given either as a
+    path or as an open text file."""
+    def __init__(self, file):
+        self._owned = isinstance(file, str)
+        self._file  = open(file, 'a') if self._owned else file
+
+    def __call__(self, event):
+        self._file.write(json.dumps(event, sort_keys=True))
+        self._file.write('\n')
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+class RingBufferSink:
+    """Keeps only the latest capacity events in memory, so tracing can stay
+    on at no I/O cost and the events leading up to a slow round can be
+    written out afterwards with drain."""
+    def __init__(self, capacity=100000):
+        self._events = collections.deque(maxlen=capacity)
+
+    def __call__(self, event):
+        self._events.append(event)
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def events(self):
+        return list(self._events)
+
+    def drain(self, sink):
+        """Pass the buffered events on to another sink and clear the buffer."""
+        while self._events:
+            sink(self._events.popleft())
@@ -0,0 +1,205 @@
+"""Reads and writes the player section of FIDE Tournament Report Files
+(TRF16, and the TRF-2x files that keep its player line layout).
+
+Each player line (001) holds the starting rank, which is the pairing
+number, the title, name, rating and points, followed by a 10 column block
+for every round: the opponent's starting rank, the colour (w, b or -) and
+the result code. Games decided by forfeit, byes and absences all enter a
+player's record as a round without an opponent, as that is how the
+engines record a bye; only the pairing-allocated (U) and full-point (F)
+byes count as downfloats. Titles are read in either case, as the title
+names (GM, WIM) or as the TRF letter codes (g, wm), and written as names.
+"""
+from array import array
+from swissdutch.constants import FideTitle, FloatStatus, Colour
+from swissdutch.player import Player
+from swissdutch.tournament import Tournament
+
+ROUNDS_COLUMN  = 91 # where the first round block starts
+ROUND_WIDTH    = 10
+MAX_PAIRING_NO = 9999 # starting ranks have four columns
+
+COLOURS = {'w': Colour.white, 'b': Colour.black}
+POINTS  = {'1': 1, '+': 1, 'W': 1, 'F': 1, 'U': 1,
+           '=': 0.5, 'D': 0.5, 'H': 0.5}
+TITLES  = dict({t.name.lower(): t for t in FideTitle},
+               g=FideTitle.GM, m=FideTitle.IM, f=FideTitle.FM,
+               c=FideTitle.CM, wg=FideTitle.WGM, wm=FideTitle.WIM,
+               wf=FideTitle.WFM, wc=FideTitle.WCM)
+PLAYED  = frozenset('10=WDL ')
+BYES    = frozenset('UF')
+
+class TrfFile:
+    """The contents of a TRF file. results maps each pairing number to the
+    result codes of that player's rounds, one character per round; headers
+    holds the other lines as (code, text) pairs, in order."""
+    def __init__(self):
+        self.players = []
+        self.results = {}
+        self.headers = []
+        self.rounds  = None # from the XXR line, if present
+
+    @property
+    def rounds_played(self):
+        return max((len(p.opponents) for p in self.players), default=0)
+
+    def tournament(self, engine=None):
+        """Return a Tournament continuing from the rounds in the file."""
+        rounds = self.rounds or self.rounds_played
+        return Tournament(self.players, rounds, engine, self.rounds_played)
+
+def read_trf(file):
+    """Read a TRF file from an iterable of lines, such as an open text file.
+
+    The lines are read one at a time. A float status depends on the
+    opponents' scores before the last two rounds, which are only known once
+    every line has been read, so each line's fields are kept until then and
+    the players are built in a second pass over those fields."""
+    trf    = TrfFile()
+    fields = []
+
+    for line in file:
+        line = line.rstrip('\r\n')
+        code = line[:3]
+
+        if code != '001':
+            if code.strip():
+                trf.headers.append((code, line[4:]))
+            if code == 'XXR':
+                trf.rounds = int(line[4:].split()[0])
+            continue
+
+        fields.append(_read_player_line(line))
+
+    rounds = max((len(f[5]) for f in fields), default=0)
+    before = {} # pairing no -> scores before the last two rounds
+
+    for (_, _, _, pairing_no, score, opponents, colour_hist,
+         codes) in fields:
+        padding = rounds - len(opponents)
+        opponents.extend([0] * padding)
+        colour_hist.extend([Colour.none] * padding)
+
+        last   = POINTS.get(codes[rounds - 1:rounds], 0)
+        before[pairing_no] = (score - last
+                              - POINTS.get(codes[rounds - 2:rounds - 1], 0),
+                              score - last)
+
+    for (name, rating, title, pairing_no, score, opponents, colour_hist,
+         codes) in fields:
+        float_status = _float_status(pairing_no, opponents, codes, before,
+                                     rounds)
+        trf.players.append(Player(name, rating, title, pairing_no, score,
+                                  float_status, opponents, colour_hist))
+        trf.results[pairing_no] = codes
+
+    return trf
+
+def _read_player_line(line):
+    pairing_no = int(line[4:8])
+    title      = line[10:13].strip()
+    name       = line[14:47].strip()
+    rating     = line[48:52].strip()
+    points     = line[80:84].strip()
+
+    if title and title.lower() not in TITLES:
+        raise ValueError('unknown title {0!r} for player {1}'
+                         .format(title, pairing_no))
+
+    length      = len(line.rstrip())
+    rounds      = max(0, -(-(length - ROUNDS_COLUMN) // ROUND_WIDTH))
+    line        = line.ljust(ROUNDS_COLUMN + rounds * ROUND_WIDTH)
+    opponents   = array('i')
+    colour_hist = array('b')
+    codes       = []
+
+    for r in range(rounds):
+        start    = ROUNDS_COLUMN + r * ROUND_WIDTH
+        block    = line[start:start + ROUND_WIDTH]
+        opponent = int(block[:4]) if block[:4].strip() else 0
+        colour   = COLOURS.get(block[5], Colour.none)
+        result   = block[7]
+
+        if not opponent or colour == Colour.none or result not in PLAYED:
+            opponent, colour = 0, Colour.none # not a game played over the board
+
+        opponents.append(opponent)
+        colour_hist.append(colour)
+        codes.append(result)
+
+    codes = ''.join(codes)
+    score = (float(points) if points
+             else sum(POINTS.get(c, 0) for c in codes))
+    score = int(score) if score == int(score) else score
+
+    return (name, int(rating) if rating else 0,
+            TITLES[title.lower()] if title else None,
+            pairing_no, score, opponents, colour_hist, codes)
+
+def _float_status(pairing_no, opponents, codes, before, rounds):
+    """Replay the floats of the last two rounds as Player.pair and
+    Player.bye would have set them."""
+    status = FloatStatus.none
+
+    for r, score in zip(range(rounds - 2, rounds), before[pairing_no]):
+        if r < 0:
+            continue
+
+        opponent = opponents[r]
+        if not opponent:
+            float_stat = (FloatStatus.down if codes[r:r + 1] in BYES
+                          else FloatStatus.none)
+        else:
+            opp_score  = before.get(opponent, (score, score))[r - rounds + 2]
+            float_stat = (FloatStatus.up if opp_score > score
+                          else FloatStatus.down if opp_score < score
+                          else FloatStatus.none)
+
+        if float_stat != FloatStatus.none:
+            status = float_stat
+        elif status < 0:
+            status += 1
+        elif status > 0:
+            status -= 1
+
+    return FloatStatus(status)
+
+def write_trf(file, players, results=None, headers=()):
+    """Write the headers and a player line for every player to file, one
+    line at a time, in pairing number order.
+
+    Rounds are written with their codes from results, as returned by
+    read_trf, where there is one. A round just paired has no result yet and
+    is left blank, except for a bye, which is written as U. Players are
+    ranked by score, then by pairing number. Fields the players do not
+    record, such as federation and FIDE id, are left blank."""
+    results = results or {}
+    ranked  = sorted(players, key=lambda p: (-p.score, p.pairing_no))
+    ranks   = {id(p): rank for rank, p in enumerate(ranked, 1)}
+
+    for code, text in headers:
+        file.write('{0} {1}\n'.format(code, text))
+
+    for p in sorted(players, key=lambda p: p.pairing_no):
+        file.write(_player_line(p, ranks[id(p)],
+                                results.get(p.pairing_no, '')))
+
+def _player_line(player, rank, codes):
+    if not 0 < player.pairing_no <= MAX_PAIRING_NO:
+        raise ValueError('pairing number {0} does not fit in a TRF player line'
+                         .format(player.pairing_no))
+
+    title = player.title.name if player.title else ''
+    line  = ['001 {0:4d}  {1:>3} {2:<33.33} {3:>4} {4:3} {5:>11} {6:10} '
+             '{7:4.1f} {8:4d}'.format(player.pairing_no, title, player.name,
+                                      player.rating or '', '', '', '',
+                                      player.score, rank)]
+
+    for r, (opponent, colour) in enumerate(zip(player.opponents,
+                                               player.colour_hist)):
+        code = codes[r:r + 1] or ('U' if not opponent else ' ')
+        line.append('  {0:>4} {1} {2}'.format(
+            opponent or '0000',
+            'w' if colour > 0 else 'b' if colour < 0 else '-', code))
+
+    return ''.join(line).rstrip() + '\n'
@@ -0,0 +1,17 @@
+"""Players and rounds shared by the test modules."""
+from swissdutch.dutch import DutchPairingEngine
+from swissdutch.constants import Colour
+from swissdutch.player import Player
+
+def white():
+    """Top seed colour selection that always gives the top seed white."""
+    return Colour.white
+
+def field(size=7):
+    """size players who have not played yet, in descending rating order."""
+    return tuple(Player(name='Player {0}'.format(i), rating=2500 - 10 * i)
+                 for i in range(size))
+
+def round_1(size=7):
+    """field(size) paired for the first round."""
+    return DutchPairingEngine(white).pair_round(1, field(size))
@@ -0,0 +1,40 @@
+import unittest
+from swissdutch.blossom import BlossomPairingEngine
+from swissdutch.batch import PairingJob, PairingJobError, pair_rounds_batch
+from fixtures import white, field, round_1
+
+class Test_PairRoundsBatch(unittest.TestCase):
+    def jobs(self):
+        return [PairingJob(1, field(6), engine_args={
+                    'top_seed_colour_selection_fn': white}),
+                PairingJob(2, round_1(7)),
+                PairingJob(2, round_1(8), engine=BlossomPairingEngine),
+                PairingJob(2, round_1(5), pair_round_args={
+                    'collect_stats': True})]
+
+    def expected(self, job):
+        return job.engine(**job.engine_args).pair_round(
+            job.round_no, job.players, job.last_round, **job.pair_round_args)
+
+    def test_results_keep_job_order(self):
+        jobs     = self.jobs()
+        expected = [self.expected(job) for job in jobs]
+
+        for workers in (1, 2):
+            results = pair_rounds_batch(jobs, workers=workers)
+            self.assertEqual(results, expected)
+            self.assertIsNotNone(results[3].stats)
+
+    def test_errors_are_reported_per_job(self):
+        jobs = self.jobs()
+        jobs.insert(1, PairingJob(2, round_1(6),
+                                  pair_round_args={'no_such_option': True}))
+
+        results = pair_rounds_batch(jobs, workers=2)
+        self.assertIsInstance(results[1], PairingJobError)
+        self.assertEqual(results[1].index, 1)
+        self.assertIn('TypeError', results[1].error)
+        self.assertEqual(results[2], self.expected(jobs[2]))
+
+if __name__ == '__main__':
+    unittest.main()
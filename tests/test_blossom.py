@@ -0,0 +1,87 @@
+import unittest
+from swissdutch.blossom import BlossomPairingEngine
+from swissdutch.matching import max_weight_matching
+from swissdutch.constants import FideTitle, Colour, FloatStatus
+from swissdutch.player import Player
+
+class Test_MaxWeightMatching(unittest.TestCase):
+    def test_prefers_heavier_matching(self):
+        edges = [(0, 1, 5), (1, 2, 11), (2, 3, 5)]
+        self.assertEqual(max_weight_matching(edges), [-1, 2, 1, -1])
+
+    def test_max_cardinality(self):
+        edges = [(0, 1, 5), (1, 2, 11), (2, 3, 5)]
+        self.assertEqual(max_weight_matching(edges, max_cardinality=True),
+                         [1, 0, 3, 2])
+
+    def test_relabel_blossom(self):
+        edges = [(1, 2, 9), (1, 3, 9), (2, 3, 10), (2, 4, 8), (3, 5, 8),
+                 (4, 5, 10), (5, 6, 6)]
+        self.assertEqual(max_weight_matching(edges),
+                         [-1, 3, 4, 1, 2, 6, 5])
+
+class Test_BlossomPairingEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = BlossomPairingEngine()
+
+    def test_pair_2nd_round(self):
+        input_players = (
+            Player('Alice',  2500, FideTitle.GM,  1, 1, FloatStatus.none,
+                   (5,), (Colour.white,)),
+            Player('Bruno',  2450, FideTitle.IM,  2, 0, FloatStatus.none,
+                   (6,), (Colour.black,)),
+            Player('Carla',  2400, FideTitle.WGM, 3, 1, FloatStatus.none,
+                   (7,), (Colour.white,)),
+            Player('David',  2350, FideTitle.FM,  4, 0, FloatStatus.down,
+                   (0,), (Colour.none,)),
+            Player('Eloise', 2300, FideTitle.WIM, 5, 0, FloatStatus.none,
+                   (1,), (Colour.black,)),
+            Player('Finn',   2250, FideTitle.FM,  6, 1, FloatStatus.none,
+                   (2,), (Colour.white,)),
+            Player('Kevin',  2200, FideTitle.FM,  7, 0, FloatStatus.none,
+                   (3,), (Colour.black,)))
+
+        result_players = self.engine.pair_round(2, input_players)
+        opponents = {p.pairing_no: p.opponents[-1] for p in result_players}
+
+        self.assertEqual(opponents, {1: 3, 3: 1, 6: 5, 5: 6, 2: 4, 4: 2, 7: 0})
+
+    def test_large_field_is_paired_from_nearby_pairs(self):
+        # Score groups of 30 are too large for every pair to get an edge.
+        input_players = [Player('Player {0}'.format(i), 2600 - i, None, i,
+                                int(i <= 30), FloatStatus.none,
+                                ((i + 29) % 60 + 1,),
+                                (Colour.white if i % 2 == (i <= 30)
+                                 else Colour.black,))
+                         for i in range(1, 61)]
+
+        result_players = self.engine.pair_round(2, input_players)
+        by_no = {p.pairing_no: p for p in result_players}
+
+        self.assertEqual(result_players.unpaired, [])
+        for p in result_players:
+            opponent = by_no[p.opponents[-1]]
+            self.assertEqual(opponent.opponents[-1], p.pairing_no)
+            self.assertEqual(opponent.score, p.score)
+            self.assertNotEqual(opponent.colour_hist[-1], p.colour_hist[-1])
+
+    def test_reports_players_without_a_legal_game(self):
+        # A finished round robin: everyone has already played everyone.
+        input_players = (
+            Player('Alice', 2500, FideTitle.GM, 1, 2, FloatStatus.none,
+                   (4, 3, 2), (Colour.white, Colour.black, Colour.white)),
+            Player('Bruno', 2450, FideTitle.IM, 2, 1, FloatStatus.none,
+                   (3, 4, 1), (Colour.white, Colour.black, Colour.black)),
+            Player('Carla', 2400, FideTitle.FM, 3, 2, FloatStatus.none,
+                   (2, 1, 4), (Colour.black, Colour.white, Colour.white)),
+            Player('David', 2350, FideTitle.FM, 4, 1, FloatStatus.none,
+                   (1, 2, 3), (Colour.black, Colour.white, Colour.black)))
+
+        result_players = self.engine.pair_round(4, input_players)
+
+        self.assertCountEqual([p.pairing_no for p in result_players.unpaired],
+                              [1, 2, 3, 4])
+        self.assertTrue(all(len(p.opponents) == 3 for p in result_players))
+
+if __name__ == '__main__':
+    unittest.main()
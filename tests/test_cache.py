@@ -0,0 +1,76 @@
+import unittest
+import itertools
+import tempfile
+from swissdutch.dutch import DutchPairingEngine
+from swissdutch.cache import PairingCache, state_key
+from swissdutch.constants import Colour
+from fixtures import white, field, round_1
+
+class Test_PairingCache(unittest.TestCase):
+    def test_repeated_round_is_answered_from_cache(self):
+        cache    = PairingCache()
+        engine   = DutchPairingEngine(white, cache=cache)
+        players  = round_1()
+        expected = DutchPairingEngine(white).pair_round(2, players)
+
+        first  = engine.pair_round(2, players)
+        second = engine.pair_round(2, tuple(reversed(players)))
+
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertFalse(any(p1 is p2 for p1 in first for p2 in second))
+
+        second[0].bye(1)
+        self.assertEqual(engine.pair_round(2, players), expected)
+
+    def test_top_seed_colour_is_part_of_key(self):
+        colours = itertools.cycle((Colour.white, Colour.black))
+        cache   = PairingCache()
+        engine  = DutchPairingEngine(lambda: next(colours), cache=cache)
+
+        as_white = engine.pair_round(1, field())
+        as_black = engine.pair_round(1, field())
+        again    = engine.pair_round(1, field())
+
+        self.assertNotEqual(as_white, as_black)
+        self.assertEqual(again, as_white)
+        self.assertEqual((len(cache), cache.hits), (2, 1))
+
+    def test_least_recently_used_are_evicted(self):
+        cache  = PairingCache(maxsize=2)
+        engine = DutchPairingEngine(white, cache=cache)
+        fields = [round_1(size) for size in (6, 7, 8)]
+
+        for players in fields + fields[2:]:
+            engine.pair_round(2, players)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertIsNone(cache.get(state_key('DutchPairingEngine', 2,
+                                              fields[0], False, 1)))
+
+    def test_results_are_shared_on_disk(self):
+        players = round_1()
+        with tempfile.TemporaryDirectory() as directory:
+            DutchPairingEngine(white, cache=PairingCache(
+                directory=directory)).pair_round(2, players)
+
+            cache  = PairingCache(directory=directory)
+            result = DutchPairingEngine(white, cache=cache).pair_round(
+                2, players)
+
+        self.assertEqual(result, DutchPairingEngine(white).pair_round(
+            2, players))
+        self.assertEqual(cache.hits, 1)
+
+    def test_budget_limited_rounds_are_not_stored(self):
+        cache  = PairingCache()
+        result = DutchPairingEngine(white, cache=cache).pair_round(
+            2, round_1(), max_steps=1)
+
+        self.assertTrue(result.budget_limited)
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 from swissdutch.dutch import DutchPairingEngine
 from swissdutch.constants import FideTitle, Colour, FloatStatus
 from swissdutch.player import Player
+from fixtures import round_1
 
 class Test_DutchPairingEngine(unittest.TestCase):
     def setUp(self):
@@ -964,4 +965,144 @@ class Test_DutchPairingEngine(unittest.TestCase):
         ]
 
         result_players = self.engine.pair_round(5, input_players)
-        self.assertCountEqual(result_players, expected_players)
\ No newline at end of file
+        self.assertCountEqual(result_players, expected_players)
+
+    def test_pair_round_within_budget(self):
+        expected_players = self.engine.pair_round(2, round_1())
+        result_players   = self.engine.pair_round(2, round_1(),
+                                                  time_budget=60,
+                                                  max_steps=100000)
+
+        self.assertFalse(expected_players.budget_limited)
+        self.assertFalse(result_players.budget_limited)
+        self.assertEqual(result_players, expected_players)
+
+    def test_pair_round_out_of_budget(self):
+        result_players = self.engine.pair_round(2, round_1(), max_steps=3)
+
+        self.assertTrue(result_players.budget_limited)
+        self.assertEqual(len(result_players), 7)
+        opponents = {p.pairing_no: p.opponents[-1] for p in result_players}
+        self.assertEqual(sum(opp == 0 for opp in opponents.values()), 1)
+        for p in result_players:
+            self.assertEqual(len(p.opponents), 2)
+            self.assertNotEqual(p.opponents[0], p.opponents[1])
+            if p.opponents[-1]:
+                self.assertEqual(opponents[p.opponents[-1]], p.pairing_no)
+
+    def test_large_remainder_is_paired_greedily(self):
+        self.engine.FALLBACK_MATCHING_PLAYERS = 4
+        result_players = self.engine.pair_round(2, round_1(), max_steps=3)
+
+        self.assertTrue(result_players.budget_limited)
+        self.assertEqual(result_players.unpaired, [])
+        opponents = {p.pairing_no: p.opponents[-1] for p in result_players}
+        self.assertEqual(sum(opp == 0 for opp in opponents.values()), 1)
+        for p in result_players:
+            self.assertNotEqual(p.opponents[0], p.opponents[1])
+            if p.opponents[-1]:
+                self.assertEqual(opponents[p.opponents[-1]], p.pairing_no)
+
+    def test_pair_round_collects_stats(self):
+        expected_players = self.engine.pair_round(2, round_1())
+        result_players   = self.engine.pair_round(2, round_1(),
+                                                  collect_stats=True)
+        self.assertIsNone(expected_players.stats)
+        self.assertEqual(result_players, expected_players)
+
+        stats = result_players.stats
+        self.assertEqual([b.score for b in stats.brackets], [1, 0])
+        for bracket in stats.brackets:
+            self.assertGreaterEqual(bracket.steps['c1'], 1)
+            self.assertLessEqual(bracket.transpositions, bracket.steps['c7'])
+            self.assertLessEqual(bracket.seconds, stats.seconds)
+        self.assertGreater(stats.brackets[-1].criteria_evaluations, 0)
+        self.assertEqual(stats.as_dict()['brackets'][0]['score'], 1)
+
+    def test_bracket_without_complete_pairing_floats_the_rest(self):
+        # Everyone in the top bracket has an opponent in Alice, but as 2, 3
+        # and 4 have all met only one pair exists, and the other two float.
+        players = [Player(name, 2500 - 10 * n, 0, n, score,
+                          FloatStatus.none, opponents, colour_hist)
+                   for name, n, score, opponents, colour_hist in (
+                       ('Alice', 1, 2, (5, 6), (Colour.white, Colour.black)),
+                       ('Bruno', 2, 2, (3, 4), (Colour.black, Colour.white)),
+                       ('Carla', 3, 2, (2, 4), (Colour.white, Colour.black)),
+                       ('David', 4, 2, (2, 3), (Colour.black, Colour.white)),
+                       ('Elena', 5, 0, (1, 6), (Colour.black, Colour.white)),
+                       ('Fabio', 6, 0, (5, 1), (Colour.white, Colour.black)))]
+
+        result = self.engine.pair_round(3, players, max_steps=1000,
+                                        collect_stats=True)
+
+        self.assertFalse(result.budget_limited)
+        self.assertEqual({p.pairing_no: p.opponents[-1] for p in result},
+                         {1: 2, 2: 1, 3: 5, 4: 6, 5: 3, 6: 4})
+        self.assertEqual(result.stats.brackets[0].steps['c14a'], 1)
+        self.assertEqual(result.stats.brackets[0].steps['c7'], 0)
+
+    def test_players_without_a_legal_game_are_reported(self):
+        # After a finished round robin B1 rules out every game, whether or
+        # not the budget runs out before C.x finds that out.
+        players = [Player(name, 2500 - 10 * n, 0, n, score,
+                          FloatStatus.none, opponents, colour_hist)
+                   for name, n, score, opponents, colour_hist in (
+                       ('Alice', 1, 2, (4, 3, 2),
+                        (Colour.white, Colour.black, Colour.white)),
+                       ('Bruno', 2, 1, (3, 4, 1),
+                        (Colour.white, Colour.black, Colour.black)),
+                       ('Carla', 3, 2, (2, 1, 4),
+                        (Colour.black, Colour.white, Colour.white)),
+                       ('David', 4, 1, (1, 2, 3),
+                        (Colour.black, Colour.white, Colour.black)))]
+
+        result = self.engine.pair_round(4, players)
+
+        self.assertFalse(result.budget_limited)
+        self.assertCountEqual([p.pairing_no for p in result.unpaired],
+                              [1, 2, 3, 4])
+        self.assertTrue(all(len(p.opponents) == 3 for p in result))
+
+        result = self.engine.pair_round(4, players, max_steps=1)
+
+        self.assertTrue(result.budget_limited)
+        self.assertCountEqual([p.pairing_no for p in result.unpaired],
+                              [1, 2, 3, 4])
+
+    def hard_round_2(self):
+        """A first round after which the 1 point bracket needs a long
+        search to reach each transposition."""
+        results = '0010110011110110001=00'
+        players = []
+        for i, result in enumerate(results, 1):
+            score  = 0.5 if result == '=' else int(result)
+            colour = Colour.white if i % 2 else Colour.black
+            players += [Player('Player {0}'.format(i), 2600 - i, None, i,
+                               score, FloatStatus.none, (i + 22,), (colour,)),
+                        Player('Player {0}'.format(i + 22), 2578 - i, None,
+                               i + 22, 1 - score, FloatStatus.none, (i,),
+                               (-colour,))]
+        return players
+
+    def test_time_budget_holds_within_transposition_search(self):
+        # The budget has to be checked within the transposition search
+        # rather than only between the steps of C.x.
+        result = self.engine.pair_round(2, self.hard_round_2(),
+                                        time_budget=0.2)
+
+        self.assertTrue(result.budget_limited)
+        self.assertFalse(result.unpaired)
+        self.assertTrue(all(len(p.opponents) == 2 for p in result))
+
+    def test_time_budget_holds_within_parallel_search(self):
+        engine = DutchPairingEngine(parallel_workers=2, parallel_min_players=4)
+        try:
+            result = engine.pair_round(2, self.hard_round_2(),
+                                       time_budget=0.2)
+        finally:
+            engine.close()
+
+        self.assertTrue(result.budget_limited)
+        self.assertEqual(len(result), 44)
+        self.assertFalse(result.unpaired)
+        self.assertTrue(all(len(p.opponents) == 2 for p in result))
@@ -2,6 +2,19 @@
 
 from test_swiss import Test_SwissPairingEngine
 from test_dutch import Test_DutchPairingEngine
+from test_pairing import (Test_Transpositions, Test_Backjumping,
+                          Test_ScoreBracketExchanges,
+                          Test_PairingCriteria, Test_BoardVerdicts,
+                          Test_BracketCounts, Test_RankedLists,
+                          Test_PairingContext)
+from test_player import Test_Player
+from test_blossom import Test_MaxWeightMatching, Test_BlossomPairingEngine
+from test_trace import Test_Tracer
+from test_batch import Test_PairRoundsBatch
+from test_tournament import Test_Tournament
+from test_trf import Test_Trf
+from test_snapshot import Test_Snapshot
+from test_cache import Test_PairingCache
 import unittest
 
 unittest.main()
\ No newline at end of file
@@ -0,0 +1,395 @@
+import unittest
+import itertools
+import threading
+from swissdutch.pairing import (ScoreBracket, PairingCriteria, Transpositions,
+                                PairingContext, BoardVerdicts, BracketCounts,
+                                PairingBudget, BudgetExhausted, ParallelSearch,
+                                search_subspace, _SubspaceBudget, rank_key,
+                                insert_ranked, remove_ranked)
+from swissdutch.constants import Colour, FloatStatus
+from swissdutch.player import Player
+
+class StubScoreBracket:
+    round_no   = 3
+    odd_round  = 1
+    last_round = False
+    x          = 0
+
+class Test_Transpositions(unittest.TestCase):
+    def setUp(self):
+        self.criteria = PairingCriteria(StubScoreBracket())
+        self.s1 = [Player('S1-%d' % i, 2000, pairing_no=i, score=2,
+                          opponents=opponents, colour_hist=colour_hist)
+                   for i, opponents, colour_hist in (
+                       (1, (5, 6), (Colour.white, Colour.black)),
+                       (2, (5, 7), (Colour.black, Colour.white)),
+                       (3, (6, 8), (Colour.white, Colour.white)))]
+        self.s2 = [Player('S2-%d' % i, 1900, pairing_no=i, score=2,
+                          opponents=opponents, colour_hist=colour_hist)
+                   for i, opponents, colour_hist in (
+                       (4, (9, 10), (Colour.white, Colour.white)),
+                       (5, (1, 2), (Colour.black, Colour.white)),
+                       (6, (1, 3), (Colour.white, Colour.black)),
+                       (7, (2, 11), (Colour.black, Colour.black)))]
+
+    def legal_transpositions(self):
+        seen = []
+        for s2 in itertools.permutations(self.s2):
+            boards = s2[:len(self.s1)]
+            if (boards not in seen
+                and all(self.criteria.pairable(p1, p2)
+                        for p1, p2 in zip(self.s1, boards))):
+                seen.append(boards)
+        return seen
+
+    def test_transpositions_in_d1_order(self):
+        expected = [b for b in self.legal_transpositions() 
+                    if b != tuple(self.s2[:len(self.s1)])]
+        actual   = [tuple(s2[:len(self.s1)]) 
+                    for s2 in Transpositions(self.s1, self.s2, self.criteria)]
+        self.assertEqual(actual, expected)
+
+    def test_transpositions_keep_all_players(self):
+        for s2 in Transpositions(self.s1, self.s2, self.criteria):
+            self.assertCountEqual(s2, self.s2)
+
+    def test_subspaces_follow_sequential_order(self):
+        transpositions = Transpositions(self.s1, self.s2, self.criteria)
+        next(transpositions)
+        expected = [[self.s2.index(p) for p in s2]
+                    for s2 in Transpositions(self.s1, self.s2, self.criteria)]
+
+        actual = [order for subspace in transpositions.split()
+                  for order in subspace]
+        self.assertEqual(actual, expected[1:])
+
+    def test_parallel_search_matches_sequential(self):
+        def accepted(s2):
+            return (sum(p1.expected_colour == p2.expected_colour
+                        for p1, p2 in zip(self.s1, s2)) <= 1
+                    and s2[-1].pairing_no != 4)
+
+        sequential = Transpositions(self.s1, self.s2, self.criteria)
+        parallel   = Transpositions(self.s1, self.s2, self.criteria)
+
+        workers    = ParallelSearch(2)
+
+        try:
+            while True:
+                expected = next((s2 for s2 in sequential if accepted(s2)),
+                                None)
+                try:
+                    actual = parallel.search(workers, 1,
+                                             lambda p: p.pairing_no != 4)
+                except StopIteration:
+                    actual = None
+
+                self.assertEqual(actual, expected)
+                if expected is None:
+                    break
+        finally:
+            workers.close()
+
+        self.assertEqual(parallel.last, sequential.last)
+
+    def test_parallel_search_keeps_to_budget(self):
+        transpositions = Transpositions(self.s1, self.s2, self.criteria,
+                                        budget=PairingBudget(time_budget=0))
+        workers        = ParallelSearch(2)
+
+        try:
+            self.assertRaises(BudgetExhausted, transpositions.search,
+                              workers, 1, lambda p: True)
+        finally:
+            workers.close()
+
+    def test_stopped_subspace_search_finds_nothing(self):
+        clashes = [bytes(len(self.s2))] * len(self.s1)
+        cancel  = threading.Event()
+
+        def search(**options):
+            subspace = Transpositions(self.s1, self.s2,
+                                      self.criteria).split()[0]
+            return search_subspace(subspace, clashes, 0, None, **options)[0]
+
+        self.assertIsNotNone(search(cancel=cancel))
+        self.assertIsNone(search(seconds=0))
+
+        cancel.set()
+        self.assertRaises(BudgetExhausted,
+                          _SubspaceBudget(None, cancel, poll=0).check)
+
+class StubCriteria:
+    """Pairs S1 position i with S2 position j if pairs[i][j], counting the
+    verdicts asked for."""
+    def __init__(self, pairs, clashes=None, x=0):
+        self.pairs    = pairs
+        self.clashes  = clashes
+        self.x        = x
+        self.verdicts = 0
+
+    def pairable(self, i, j):
+        self.verdicts += 1
+        return self.pairs[i][j]
+
+    def clash(self, i, j):
+        return self.clashes[i][j]
+
+class Test_Backjumping(unittest.TestCase):
+    def brute_force(self, criteria, k, m, colours=False):
+        seen = []
+        for order in itertools.permutations(range(m)):
+            boards = order[:k]
+            if (boards not in seen
+                and all(criteria.pairs[i][j] for i, j in enumerate(boards))
+                and (not colours
+                     or sum(criteria.clashes[i][j]
+                            for i, j in enumerate(boards)) <= criteria.x)):
+                seen.append(boards)
+        return [b for b in seen if b != tuple(range(k))]
+
+    def transpositions(self, criteria, k, m, colours=False):
+        return [tuple(order[:k])
+                for order in Transpositions(list(range(k)), list(range(m)),
+                                            criteria, colours=colours)]
+
+    def test_same_transpositions_as_brute_force(self):
+        for seed in range(20):
+            rows    = [[(i * 7 + j * 5 + seed) % 4 != 0 for j in range(6)]
+                       for i in range(5)]
+            clashes = [[(i + j + seed) % 3 == 0 for j in range(6)]
+                       for i in range(5)]
+            for colours in (False, True):
+                criteria = StubCriteria(rows, clashes, x=1)
+                self.assertEqual(
+                    self.transpositions(criteria, 5, 6, colours),
+                    self.brute_force(criteria, 5, 6, colours))
+
+    def test_jumps_back_to_conflicting_board(self):
+        # The last S1 player can only take the first S2 player, whom the
+        # second board takes as soon as the first board moves on. None of
+        # the boards in between need be tried again.
+        n        = 10
+        rows     = ([[ix != 0 for ix in range(n)]]
+                    + [[True] * n for _ in range(n - 2)]
+                    + [[ix == 0 for ix in range(n)]])
+        criteria = StubCriteria(rows)
+
+        transpositions = Transpositions(list(range(n)), list(range(n)),
+                                        criteria)
+
+        self.assertEqual(next(transpositions), [1, 2, 3, 4, 5, 6, 7, 8, 9, 0])
+        self.assertLess(criteria.verdicts, 1000)
+
+    def test_budget_is_checked_within_search(self):
+        rows     = [[True] * 6 for _ in range(6)]
+        budget   = PairingBudget(time_budget=0)
+        criteria = StubCriteria(rows)
+
+        transpositions = Transpositions(list(range(6)), list(range(6)),
+                                        criteria, budget=budget)
+
+        self.assertRaises(BudgetExhausted, next, transpositions)
+
+    def test_colour_limit_skips_prefixes(self):
+        rows     = [[True] * 4 for _ in range(3)]
+        clashes  = [[j % 2 == 0 for j in range(4)] for _ in range(3)]
+        criteria = StubCriteria(rows, clashes, x=1)
+
+        self.assertEqual(self.transpositions(criteria, 3, 4, True),
+                         self.brute_force(criteria, 3, 4, True))
+        self.assertTrue(all(sum(j % 2 == 0 for j in order) <= 1
+                            for order in self.transpositions(criteria, 3, 4,
+                                                             True)))
+
+class Test_ScoreBracketExchanges(unittest.TestCase):
+    def test_exchanges_in_d2_order(self):
+        s1 = [Player('S1-%d' % i, 2000, pairing_no=i, score=1)
+              for i in (3, 2, 1)]
+        s2 = [Player('S2-%d' % i, 1900, pairing_no=i, score=1)
+              for i in (4, 5, 6)]
+
+        exchanges = [(tuple(p.pairing_no for p in s1_subset),
+                      tuple(p.pairing_no for p in s2_subset))
+                     for s1_subset, s2_subset
+                     in ScoreBracket._generate_exchanges(s1, s2, 1)]
+
+        self.assertEqual(exchanges, [((3,), (4,)), ((3,), (5,)), ((3,), (6,)),
+                                     ((2,), (4,)), ((2,), (5,)), ((2,), (6,)),
+                                     ((1,), (4,)), ((1,), (5,)), ((1,), (6,))])
+
+    def test_exchanges_are_lazy(self):
+        s1 = [Player('S1-%d' % i, 2000, pairing_no=i, score=1)
+              for i in range(40, 0, -1)]
+        s2 = [Player('S2-%d' % i, 1900, pairing_no=i, score=1)
+              for i in range(41, 81)]
+
+        exchanges = ScoreBracket._generate_exchanges(s1, s2, 20)
+        s1_subset, s2_subset = next(exchanges)
+
+        self.assertCountEqual([p.pairing_no for p in s1_subset], range(21, 41))
+        self.assertEqual([p.pairing_no for p in s2_subset], list(range(41, 61)))
+
+    def test_budget_is_checked_between_exchanges(self):
+        s1 = [Player('S1-%d' % i, 2000, pairing_no=i, score=0)
+              for i in range(40, 0, -1)]
+        s2 = [Player('S2-%d' % i, 1900, pairing_no=i, score=i % 2)
+              for i in range(41, 81)]
+
+        # Listing every exchange would take far longer than any test run.
+        budget = PairingBudget(time_budget=0)
+
+        self.assertRaises(BudgetExhausted, list,
+                          ScoreBracket._generate_exchanges(s1, s2, 20, budget))
+
+class Test_PairingCriteria(unittest.TestCase):
+    def setUp(self):
+        self.criteria = PairingCriteria(StubScoreBracket())
+        self.p1 = Player('Alice', 2000, pairing_no=1, score=1,
+                         float_status=FloatStatus.up, opponents=(3, 4),
+                         colour_hist=(Colour.white, Colour.black))
+        self.p2 = Player('Bruno', 2000, pairing_no=2, score=2,
+                         opponents=(5, 6),
+                         colour_hist=(Colour.black, Colour.white))
+        self.p3 = Player('Carla', 2000, pairing_no=3, score=1,
+                         opponents=(1, 7),
+                         colour_hist=(Colour.black, Colour.white))
+
+    def test_pairable_follows_relaxation(self):
+        self.assertTrue(self.criteria.compatible(self.p1, self.p2))
+        self.assertFalse(self.criteria.pairable(self.p1, self.p2))
+
+        self.criteria.b5_enabled_for_upfloaters = False
+        self.assertTrue(self.criteria.pairable(self.p1, self.p2))
+
+        self.criteria.b5_enabled_for_upfloaters = True
+        self.assertFalse(self.criteria.pairable(self.p1, self.p2))
+
+    def test_players_who_met_are_incompatible(self):
+        self.assertFalse(self.criteria.compatible(self.p1, self.p3))
+        self.assertFalse(self.criteria.compatible(self.p3, self.p1))
+        self.assertFalse(self.criteria.pairable(self.p3, self.p1))
+
+    def test_verdicts_are_kept_across_relaxations(self):
+        players = (self.p1, self.p2, self.p3)
+        def verdicts():
+            return [self.criteria.pairable(a, b)
+                    for a in players for b in players if a is not b]
+
+        strict      = verdicts()
+        evaluations = self.criteria.evaluations
+
+        self.criteria.b5_enabled_for_upfloaters = False
+        relaxed = verdicts()
+        # Only the pairs that failed need to be judged again, and B1a and
+        # B2 not at all.
+        self.assertEqual(self.criteria.evaluations - evaluations,
+                         strict.count(False))
+        self.assertGreater(relaxed.count(True), strict.count(True))
+
+        evaluations = self.criteria.evaluations
+        self.criteria.b5_enabled_for_upfloaters = True
+        self.assertEqual(verdicts(), strict)
+        self.criteria.b5_enabled_for_upfloaters = False
+        self.assertEqual(verdicts(), relaxed)
+        self.assertEqual(self.criteria.evaluations, evaluations)
+
+class Test_BoardVerdicts(unittest.TestCase):
+    def setUp(self):
+        colours = (Colour.white, Colour.black, Colour.white, Colour.white,
+                   Colour.black, Colour.black)
+        self.players = [Player(str(i), 2000, pairing_no=i + 1, opponents=(9,),
+                               colour_hist=(colour,))
+                        for i, colour in enumerate(colours)]
+        self.calls   = []
+
+        def pairable(p1, p2):
+            self.calls.append((p1, p2))
+            return p1.pairing_no != 1 or p2.pairing_no != 4
+
+        self.verdicts = BoardVerdicts(pairable)
+
+    def test_totals_follow_pairings(self):
+        a, b, c, d, e, f = self.players
+        for pairings in ([(a, b), (c, d), (e, f)],
+                         [(a, d), (c, b), (e, f)],
+                         [(a, b), (c, d)],
+                         [(c, e)]):
+            self.verdicts.update(pairings)
+            self.assertEqual(self.verdicts.failed,
+                             sum(p1 is a and p2 is d for p1, p2 in pairings))
+            self.assertEqual(self.verdicts.violated,
+                             sum(p1.expected_colour == p2.expected_colour
+                                 for p1, p2 in pairings))
+
+    def test_only_changed_boards_are_checked(self):
+        a, b, c, d, e, f = self.players
+        self.verdicts.update([(a, b), (c, d), (e, f)])
+        del self.calls[:]
+
+        self.verdicts.update([(a, b), (c, f), (e, d)])
+        self.assertEqual(self.calls, [(c, f), (e, d)])
+
+class Test_BracketCounts(unittest.TestCase):
+    def test_counts_follow_players(self):
+        histories = ((1, (Colour.white,)), (1, (Colour.black,)),
+                     (2, (Colour.white, Colour.white)),
+                     (1, (Colour.black, Colour.white)), (0, ()),
+                     (1.5, (Colour.black,)))
+        players   = [Player(str(i), 2000, pairing_no=i + 1, score=score,
+                            colour_hist=colours)
+                     for i, (score, colours) in enumerate(histories)]
+        counts    = BracketCounts(1, players[:5])
+        counts.remove(players[2])
+        counts.add(players[5])
+
+        for c in (counts, BracketCounts(1, players[:2] + players[3:])):
+            self.assertEqual((c.n, c.above), (5, 1))
+            self.assertEqual(c.colour, [2, 1, 2]) # black, none, white
+            self.assertEqual(c.mild, [1, 1, 0])
+
+class Test_RankedLists(unittest.TestCase):
+    def test_insert_and_remove_keep_rank_order(self):
+        players = [Player(str(i), 2000, pairing_no=i % 5 + 1, score=i % 3 / 2)
+                   for i in range(10)]
+        ranked  = []
+        for i, p in enumerate(players):
+            insert_ranked(ranked, p)
+            self.assertEqual(ranked, sorted(players[:i + 1], key=rank_key))
+            self.assertTrue(all(a is b for a, b in
+                                zip(ranked, sorted(players[:i + 1],
+                                                   key=rank_key))))
+
+        for p in players[::3]:
+            remove_ranked(ranked, p)
+            self.assertFalse(any(q is p for q in ranked))
+        self.assertEqual(ranked, sorted((p for i, p in enumerate(players)
+                                         if i % 3), key=rank_key))
+        self.assertRaises(ValueError, remove_ranked, ranked, players[0])
+
+class Test_PairingContext(unittest.TestCase):
+    def setUp(self):
+        self.alice = Player('Alice', 2000, pairing_no=1, score=1)
+        self.twin  = Player('Alice', 2000, pairing_no=1, score=1)
+        self.bruno = Player('Bruno', 2000, pairing_no=2, score=0)
+        self.top   = ScoreBracket(1, [self.alice, self.twin])
+        self.lower = ScoreBracket(0, [self.bruno])
+        self.ctx   = PairingContext(2, False, 1, [self.top, self.lower])
+        next(self.ctx)
+
+    def test_downfloaters_are_tracked_by_identity(self):
+        self.assertEqual(self.alice, self.twin)
+        self.ctx.downfloat(self.twin)
+
+        self.assertFalse(self.ctx.can_downfloat(self.twin))
+        self.assertTrue(self.ctx.can_downfloat(self.alice))
+
+    def test_removes_the_player_given(self):
+        self.ctx.downfloat(self.twin)
+
+        self.assertEqual(len(self.top.all_players), 1)
+        self.assertIs(self.top.all_players[0], self.alice)
+        self.assertIs(self.lower.all_players[-1], self.twin)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import copy
+import pickle
+from swissdutch.constants import Colour, ColourPref
+from swissdutch.player import Player
+
+class Test_Player(unittest.TestCase):
+    def test_colour_preference_follows_games(self):
+        alice = Player('Alice', 2500, pairing_no=1, opponents=(2,),
+                       colour_hist=(Colour.white,))
+        bruno = Player('Bruno', 2400, pairing_no=2)
+        carla = Player('Carla', 2300, pairing_no=3)
+
+        self.assertEqual(alice.colour_preference, ColourPref.blackStr)
+        self.assertEqual(alice.expected_colour, Colour.black)
+
+        alice.pair(bruno, Colour.black)
+        self.assertEqual(alice.colour_preference, ColourPref.mild)
+        self.assertEqual(alice.expected_colour, Colour.white)
+
+        alice.bye(1)
+        self.assertEqual(alice.colour_preference, ColourPref.mild)
+        self.assertEqual(alice.expected_colour, Colour.white)
+
+        alice.pair(carla, Colour.white)
+        self.assertEqual(alice.colour_preference, ColourPref.blackStr)
+        self.assertEqual(alice.expected_colour, Colour.black)
+
+    def test_history_grows_in_place(self):
+        alice = Player('Alice', 2500, pairing_no=1, opponents=(2,),
+                       colour_hist=(Colour.white,))
+        bruno = Player('Bruno', 2400, pairing_no=2)
+
+        alice.pair(bruno, Colour.black)
+        alice.bye(1)
+
+        self.assertEqual(tuple(alice.opponents), (2, 2, 0))
+        self.assertEqual(tuple(alice.colour_hist),
+                         (Colour.white, Colour.black, Colour.none))
+        self.assertEqual(alice, Player('Alice', 2500, pairing_no=1, score=1,
+                                       float_status=alice.float_status,
+                                       opponents=(2, 2, 0),
+                                       colour_hist=(Colour.white, Colour.black,
+                                                    Colour.none)))
+
+    def test_history_is_read_as_tuples(self):
+        alice = Player('Alice', 2500, pairing_no=1, opponents=(5, 3),
+                       colour_hist=(Colour.white, Colour.black))
+        bruno = Player('Bruno', 2400, pairing_no=2)
+
+        self.assertEqual(alice.opponents, (5, 3))
+        self.assertIs(alice.colour_hist[0], Colour.white)
+
+        alice.pair(bruno, Colour.white)
+        self.assertEqual(alice.opponents, (5, 3, 2))
+        self.assertEqual(alice.colour_hist,
+                         (Colour.white, Colour.black, Colour.white))
+        self.assertEqual(alice.expected_colour, Colour.black)
+
+    def test_copies_compare_equal(self):
+        alice = Player('Alice', 2500, pairing_no=1, opponents=(2,),
+                       colour_hist=(Colour.white,))
+
+        self.assertEqual(copy.deepcopy(alice), alice)
+        self.assertEqual(pickle.loads(pickle.dumps(alice)), alice)
+
+    def test_shallow_copy_owns_its_history(self):
+        alice = Player('Alice', 2500, pairing_no=1, opponents=(2,),
+                       colour_hist=(Colour.white,))
+        bruno = Player('Bruno', 2400, pairing_no=2)
+
+        clone = copy.copy(alice)
+        self.assertEqual(clone, alice)
+
+        clone.pair(bruno, Colour.black)
+        self.assertEqual(tuple(alice.opponents), (2,))
+        self.assertEqual(tuple(alice.colour_hist), (Colour.white,))
+        self.assertEqual(alice.expected_colour, Colour.black)
+        self.assertEqual(clone.expected_colour, Colour.white)
+
+    def test_no_colour_preference_without_games(self):
+        alice = Player('Alice', 2500, pairing_no=1, opponents=(0,),
+                       colour_hist=(Colour.none,))
+
+        self.assertEqual(alice.colour_preference, ColourPref.mild)
+        self.assertEqual(alice.expected_colour, Colour.none)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import io
+import os
+import tempfile
+from swissdutch.dutch import DutchPairingEngine
+from swissdutch.snapshot import write_snapshot, Snapshot
+from swissdutch.constants import FideTitle, Colour
+from swissdutch.player import Player
+
+class Test_Snapshot(unittest.TestCase):
+    def players(self):
+        players = (Player(name='Alice', rating=2500, title=FideTitle.GM),
+                   Player(name='Bruno', rating=2450, title=FideTitle.WIM),
+                   Player(name='Carla', rating=2400, title=0),
+                   Player(name='Dávid', rating=2350),
+                   Player(name='Eloise', rating=2300))
+        engine  = DutchPairingEngine(lambda: Colour.white)
+        return engine.pair_round(2, engine.pair_round(1, players))
+
+    def test_players_survive_snapshot(self):
+        players = self.players()
+        file    = io.BytesIO()
+        write_snapshot(file, players)
+
+        with Snapshot(file.getvalue()) as snapshot:
+            self.assertEqual(len(snapshot), len(players))
+            self.assertEqual(snapshot.players, players)
+            self.assertEqual([snapshot.player(i).title
+                              for i in range(len(snapshot))],
+                             [p.title for p in players])
+            self.assertEqual(list(snapshot.pairing_nos),
+                             [p.pairing_no for p in players])
+
+            opponents, colour_hist = snapshot.games(0)
+            self.assertEqual(list(opponents), list(players[0].opponents))
+            self.assertEqual(list(colour_hist), list(players[0].colour_hist))
+            del opponents, colour_hist
+
+    def test_open_maps_file(self):
+        players = self.players()
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                write_snapshot(file, players)
+
+            with Snapshot.open(path) as snapshot:
+                self.assertEqual(snapshot.players, players)
+                self.assertIn('Dávid', [snapshot.name(i)
+                                        for i in range(len(snapshot))])
+        finally:
+            os.remove(path)
+
+    def test_rejects_other_data(self):
+        file = io.BytesIO()
+        write_snapshot(file, [])
+        data = bytearray(file.getvalue())
+
+        self.assertEqual(Snapshot(bytes(data)).players, [])
+
+        data[4] = 99 # version
+        self.assertRaises(ValueError, Snapshot, bytes(data))
+        self.assertRaises(ValueError, Snapshot, b'PK\x03\x04' + bytes(data[4:]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
 import unittest
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from swissdutch.dutch import DutchPairingEngine
 from swissdutch.constants import FideTitle, Colour, FloatStatus
 from swissdutch.player import Player
@@ -173,4 +175,54 @@ class Test_SwissPairingEngine(unittest.TestCase):
         ]
         
         result_players = self.engine.pair_round(1, input_players)
-        self.assertEqual(result_players, expected_players)
\ No newline at end of file
+        self.assertEqual(result_players, expected_players)
+
+    def test_shallow_copy_leaves_input_untouched(self):
+        shallow_engine = DutchPairingEngine(self.select_top_seed_colour,
+                                            shallow_copy=True)
+        input_players  = tuple(Player(name=name, rating=rating)
+                               for name, rating in (('Alice', 2500),
+                                                    ('Bruno', 2400),
+                                                    ('Carla', 2300),
+                                                    ('David', 2200),
+                                                    ('Eloise', 2100)))
+        round_1 = self.engine.pair_round(1, input_players)
+        before  = [repr(p) for p in round_1]
+
+        expected_players = self.engine.pair_round(2, round_1)
+        result_players   = shallow_engine.pair_round(2, round_1)
+
+        self.assertEqual(result_players, expected_players)
+        self.assertEqual([repr(p) for p in round_1], before)
+        self.assertFalse(any(p1 is p2 for p1 in result_players
+                                      for p2 in round_1))
+
+    def rounds(self):
+        fields = []
+        for size in range(6, 14):
+            players = tuple(Player(name='Player {0}'.format(i),
+                                   rating=2500 - 10 * i)
+                            for i in range(size))
+            fields.append(self.engine.pair_round(1, players))
+        return fields
+
+    def test_engine_is_shared_across_threads(self):
+        fields   = self.rounds() * 4
+        expected = [self.engine.pair_round(2, f) for f in fields]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda f: self.engine.pair_round(2, f), fields))
+
+        self.assertEqual(results, expected)
+
+    def test_pair_round_async(self):
+        fields   = self.rounds()
+        expected = [self.engine.pair_round(2, f) for f in fields]
+
+        async def pair_all():
+            return await asyncio.gather(*(self.engine.pair_round_async(2, f)
+                                          for f in fields))
+
+        self.assertEqual(asyncio.run(pair_all()), expected)
+
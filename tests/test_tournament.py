@@ -0,0 +1,76 @@
+import unittest
+from swissdutch.dutch import DutchPairingEngine
+from swissdutch.blossom import BlossomPairingEngine
+from swissdutch.tournament import Tournament
+from swissdutch.constants import Colour
+from swissdutch.player import Player
+from fixtures import white, field
+
+class Test_Tournament(unittest.TestCase):
+    def results(self, players):
+        """White wins every game."""
+        return {p.pairing_no: int(p.colour_hist[-1] == Colour.white)
+                for p in players if p.opponents[-1]}
+
+    def rescored(self, players, results):
+        return [Player(p.name, p.rating, p.title, p.pairing_no,
+                       p.score + results.get(p.pairing_no, 0), p.float_status,
+                       tuple(p.opponents), tuple(p.colour_hist))
+                for p in players]
+
+    def test_rounds_match_pair_round(self):
+        for engine_class in (DutchPairingEngine, BlossomPairingEngine):
+            engine     = engine_class(white)
+            players    = field(7)
+            tournament = Tournament(players, 4, engine_class(white))
+
+            for round_no in range(1, 5):
+                expected = engine.pair_round(round_no, players, round_no == 4)
+                paired   = tournament.pair_next_round()
+                self.assertEqual(paired, expected)
+
+                results = self.results(paired)
+                tournament.record_results(results)
+                players = self.rescored(expected, results)
+                self.assertEqual(tournament.players,
+                                 sorted(players, key=lambda p: (-p.score,
+                                                                p.pairing_no)))
+
+    def test_score_groups_follow_results(self):
+        tournament = Tournament(field(5), 3, DutchPairingEngine(white))
+        tournament.pair_next_round()
+
+        self.assertEqual([p.pairing_no for p in tournament.score_group(1)],
+                         [5]) # the bye
+        tournament.record_results({1: 1, 4: 0, 2: 0.5, 3: 0.5})
+
+        self.assertEqual([p.pairing_no for p in tournament.score_group(1)],
+                         [1, 5])
+        self.assertEqual([p.pairing_no for p in tournament.score_group(0.5)],
+                         [2, 3])
+        self.assertEqual(tournament.player(4).score, 0)
+
+        tournament.withdraw(3)
+        self.assertEqual([p.pairing_no for p in tournament.players],
+                         [1, 5, 2, 4])
+
+    def test_rounds_must_be_completed_in_order(self):
+        tournament = Tournament(field(4), 1, DutchPairingEngine(white))
+        self.assertRaises(ValueError, tournament.record_results, {})
+
+        tournament.pair_next_round()
+        self.assertRaises(ValueError, tournament.pair_next_round)
+
+        tournament.record_results({1: 1, 3: 0, 2: 1, 4: 0})
+        self.assertRaises(ValueError, tournament.pair_next_round)
+
+    def test_input_players_are_untouched(self):
+        players    = field(6)
+        tournament = Tournament(players, 2, DutchPairingEngine(white))
+        tournament.pair_next_round()
+
+        self.assertTrue(all(p.pairing_no is None and not p.opponents
+                            for p in players))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import io
+import json
+from swissdutch.dutch import DutchPairingEngine
+from swissdutch.trace import Tracer, JsonLinesSink, RingBufferSink
+from fixtures import round_1
+
+class Test_Tracer(unittest.TestCase):
+    def test_traced_round_is_unchanged(self):
+        events = []
+        engine = DutchPairingEngine(tracer=Tracer(events.append))
+
+        expected_players = DutchPairingEngine().pair_round(2, round_1())
+        result_players   = engine.pair_round(2, round_1())
+
+        self.assertEqual(result_players, expected_players)
+        self.assertEqual(events[0]['event'], 'round')
+        self.assertEqual(events[-1], {'event': 'done', 'round_no': 2,
+                                      'budget_limited': False, 'trace': 0,
+                                      'seq': len(events) - 1})
+        self.assertEqual([e['seq'] for e in events], list(range(len(events))))
+        self.assertIn({'event': 'downfloat', 'score': 1, 'player': 7,
+                       'trace': 0, 'seq': events[1]['seq'] + 1}, events)
+        self.assertTrue(any(e['event'] == 'step' and e['step'] == 'c6'
+                            for e in events))
+
+    def test_rounds_are_sampled(self):
+        events = []
+        engine = DutchPairingEngine(tracer=Tracer(events.append,
+                                                  sample_rate=0))
+        engine.pair_round(2, round_1())
+
+        self.assertEqual(events, [])
+
+    def test_ring_buffer_keeps_latest_events(self):
+        buffer = RingBufferSink(capacity=3)
+        trace  = Tracer(buffer).start_round(1, False)
+        for step in ('c1', 'c2a', 'c2b', 'c3a'):
+            trace.emit('step', score=0, step=step)
+
+        self.assertEqual([e['step'] for e in buffer.events],
+                         ['c2a', 'c2b', 'c3a'])
+
+        file = io.StringIO()
+        buffer.drain(JsonLinesSink(file))
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual([json.loads(line)['seq']
+                          for line in file.getvalue().splitlines()],
+                         [2, 3, 4])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import io
+from swissdutch.dutch import DutchPairingEngine
+from swissdutch.tournament import Tournament
+from swissdutch.trf import read_trf, write_trf
+from swissdutch.constants import FideTitle, Colour, FloatStatus
+from swissdutch.player import Player
+from fixtures import white, field
+
+TRF = '''\
+012 Club Championship
+XXR 5
+001    1 m GM Alice                             2500 NOR     1503014 1990/01/01  2.0    1     3 w 1     2 b 1
+001    2 f IM Bruno                             2450 ITA     1234567 1992/02/02  1.0    2  0000 - U     1 w 0
+001    3 m    Carla                             2400 GER     2345678 1994/03/03  0.5    3     1 b 0     4 w =
+001    4 f    David                                  ESP     3456789 1996/04/04  0.5    4  0000 - H     3 b =
+'''
+
+class Test_Trf(unittest.TestCase):
+    @staticmethod
+    def by_pairing_no(players):
+        return sorted(players, key=lambda p: p.pairing_no)
+
+    def test_read_players(self):
+        trf = read_trf(io.StringIO(TRF))
+
+        self.assertEqual(trf.rounds, 5)
+        self.assertEqual(trf.rounds_played, 2)
+        self.assertEqual(trf.headers, [('012', 'Club Championship'),
+                                       ('XXR', '5')])
+        self.assertEqual(trf.results, {1: '11', 2: 'U0', 3: '0=', 4: 'H='})
+        self.assertEqual(trf.players, [
+            Player('Alice', 2500, FideTitle.GM, 1, 2, FloatStatus.none,
+                   (3, 2), (Colour.white, Colour.black)),
+            Player('Bruno', 2450, FideTitle.IM, 2, 1, FloatStatus.downPrev,
+                   (0, 1), (Colour.none, Colour.white)),
+            Player('Carla', 2400, None, 3, 0.5, FloatStatus.none,
+                   (1, 4), (Colour.black, Colour.white)),
+            Player('David', 0, None, 4, 0.5, FloatStatus.none,
+                   (0, 3), (Colour.none, Colour.black))])
+
+    def test_untitled_players_rank_below_titled_ones(self):
+        trf = read_trf(io.StringIO(
+            '001    1 m    Alice                             2400\n'
+            '001    2 m FM Bruno                             2400\n'))
+        self.assertIsNone(trf.players[0].title)
+
+        paired = DutchPairingEngine(white).pair_round(1, trf.players)
+        self.assertEqual([p.name for p in sorted(paired,
+                                                 key=lambda p: p.pairing_no)],
+                         ['Bruno', 'Alice'])
+
+    def test_titles_read_in_any_case_or_as_codes(self):
+        trf = read_trf(io.StringIO(
+            '001    1 m gm Alice                             2500\n'
+            '001    2 f wg Bruno                             2400\n'
+            '001    3 m  m Carla                             2300\n'
+            '001    4 f Wfm David                            2200\n'))
+        self.assertEqual([p.title for p in trf.players],
+                         [FideTitle.GM, FideTitle.WGM, FideTitle.IM,
+                          FideTitle.WFM])
+
+    def test_unknown_title_is_rejected(self):
+        with self.assertRaises(ValueError):
+            read_trf(io.StringIO(
+                '001    1 m XM Alice                             2500\n'))
+
+    def test_written_rounds_read_back(self):
+        tournament = Tournament(field(7), 4, DutchPairingEngine(white))
+        codes      = {}
+
+        for round_no in range(1, 4):
+            paired = tournament.pair_next_round()
+            for p in paired:
+                code = ('U' if not p.opponents[-1]
+                        else '1' if p.colour_hist[-1] == Colour.white else '0')
+                codes[p.pairing_no] = codes.get(p.pairing_no, '') + code
+
+            file = io.StringIO()
+            write_trf(file, paired, {n: c[:-1] for n, c in codes.items()})
+            file.seek(0)
+            self.assertEqual(read_trf(file).players, self.by_pairing_no(
+                tournament.players))
+
+            tournament.record_results({n: int(c[-1] == '1')
+                                       for n, c in codes.items()
+                                       if c[-1] != 'U'})
+
+            file = io.StringIO()
+            write_trf(file, tournament.players, codes, [('XXR', '4')])
+            file.seek(0)
+            trf = read_trf(file)
+            self.assertEqual(trf.players, self.by_pairing_no(
+                tournament.players))
+            self.assertEqual(trf.results, codes)
+
+        resumed = trf.tournament(DutchPairingEngine(white))
+        self.assertEqual(resumed.pair_next_round(),
+                         tournament.pair_next_round())
+
+if __name__ == '__main__':
+    unittest.main()